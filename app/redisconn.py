@@ -1,10 +1,115 @@
+import os
+
 import redis.asyncio as redis
 
+from utils.metrics import Gauge
+
+redis_pool_connections = Gauge(
+    "redis_pool_connections", "Connections held by the shared Redis pool by state"
+)
+redis_pool_max_connections = Gauge(
+    "redis_pool_max_connections", "Size limit of the shared Redis pool"
+)
+
+
+class TrackedConnectionPool(redis.BlockingConnectionPool):
+    # redis-py 내부 속성에 의존하지 않도록 생성/대여된 연결 수를 직접 셈
+    def reset(self):
+        super().reset()
+        self.opened_connections = 0
+        self.checked_out_connections = 0
+
+    def make_connection(self):
+        connection = super().make_connection()
+        self.opened_connections += 1
+        return connection
+
+    async def get_connection(self, *args, **kwargs):
+        connection = await super().get_connection(*args, **kwargs)
+        self.checked_out_connections += 1
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        self.checked_out_connections = max(0, self.checked_out_connections - 1)
+
 
 class RedisConn:
-    def __init__(self, host: str, port: int, db: int):
-        self._pool = redis.ConnectionPool(host=host, port=port, db=db)
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int,
+        max_connections: int = 50,
+        timeout: float = 5,
+        health_check_interval: int = 30,
+    ):
+        self._pool = TrackedConnectionPool(
+            host=host,
+            port=port,
+            db=db,
+            max_connections=max_connections,
+            timeout=timeout,
+            health_check_interval=health_check_interval,
+            socket_keepalive=True,
+        )
+        self._connection = redis.Redis(connection_pool=self._pool)
 
     @property
     def connection(self):
-        return redis.Redis(connection_pool=self._pool)
+        return self._connection
+
+    @property
+    def max_connections(self) -> int:
+        return self._pool.max_connections
+
+    @property
+    def in_use_connections(self) -> int:
+        return self._pool.checked_out_connections
+
+    @property
+    def idle_connections(self) -> int:
+        pool = self._pool
+        return max(0, pool.opened_connections - pool.checked_out_connections)
+
+    async def ping(self) -> bool:
+        return await self._connection.ping()
+
+    async def close(self) -> None:
+        await self._connection.aclose()
+        await self._pool.disconnect()
+
+
+redis_conn: RedisConn | None = None
+
+
+def init_redis_pool() -> RedisConn:
+    global redis_conn
+    if redis_conn is None:
+        redis_conn = RedisConn(
+            host=os.environ["REDIS_HOST"],
+            port=int(os.environ["REDIS_PORT"]),
+            db=0,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+            timeout=float(os.getenv("REDIS_POOL_TIMEOUT", "5")),
+            health_check_interval=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30")),
+        )
+        redis_pool_max_connections.set(redis_conn.max_connections)
+        redis_pool_connections.set_function(
+            lambda: redis_conn.in_use_connections if redis_conn else 0, state="in_use"
+        )
+        redis_pool_connections.set_function(
+            lambda: redis_conn.idle_connections if redis_conn else 0, state="idle"
+        )
+    return redis_conn
+
+
+async def close_redis_pool() -> None:
+    global redis_conn
+    if redis_conn is not None:
+        await redis_conn.close()
+        redis_conn = None
+
+
+def get_redis_pool() -> redis.Redis:
+    return init_redis_pool().connection
@@ -6,10 +6,22 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app.redisconn import init_redis_pool, close_redis_pool
+from app.requestid import RequestIdMiddleware
 from router import user, realtime, flow, brainstorm
+from service.answercache import answer_cache
+from service.brainstorm import notion_queue
+from service.cachebus import cache_bus
+from service.community import community_index
+from service.flowstore import flow_snapshots
+from service.websocket import connection_manager
+from utils.looplag import loop_lag_monitor
+from utils.request import close_shared_session
 
 from utils.log import Logger
+from utils.metrics import render_metrics
 
 logger = Logger.create(__name__, level=logging.DEBUG)
 load_dotenv()
@@ -22,10 +34,33 @@ async def lifespan(_server: FastAPI):
         database=motor_client[os.getenv("MONGODB_DATABASE")],
         document_models=[
             "entity.user.User",
+            "entity.flow.Flow",
+            "entity.flow.FlowVersion",
+            "entity.community.CommunityFlow",
         ],
     )
     logger.info("Connected to MongoDB")
+    redis_conn = init_redis_pool()
+    await redis_conn.ping()
+    logger.info(f"Connected to Redis (max {redis_conn.max_connections} connections)")
+    await cache_bus.start()
+    await notion_queue.start()
+    await flow_snapshots.start()
+    await community_index.start()
+    await connection_manager.start()
+    await loop_lag_monitor.start()
+    await brainstorm.start_answer_cache()
     yield
+    await answer_cache.stop()
+    await loop_lag_monitor.stop()
+    await connection_manager.stop()
+    await community_index.stop()
+    await flow_snapshots.stop()
+    await notion_queue.stop()
+    await cache_bus.stop()
+    await close_shared_session()
+    await close_redis_pool()
+    logger.info("Disconnected from Redis")
     motor_client.close()
     logger.info("Disconnected from MongoDB")
 
@@ -47,7 +82,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 
 app.include_router(user.router)
@@ -59,3 +96,19 @@ app.include_router(brainstorm.router)
 @app.get("/")
 async def root():
     return {"message": "Hello World"}
+
+
+@app.get("/health", include_in_schema=False)
+async def health():
+    try:
+        await init_redis_pool().ping()
+    except Exception as e:
+        return JSONResponse(
+            status_code=503, content={"status": "unavailable", "redis": str(e)}
+        )
+    return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics())
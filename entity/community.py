@@ -0,0 +1,38 @@
+from datetime import datetime
+from uuid import UUID
+from beanie import Document
+from pydantic import ConfigDict, Field, field_serializer
+from pymongo import DESCENDING, TEXT, IndexModel
+
+
+class CommunityFlow(Document):
+    id: UUID = Field(alias="_id")
+    start_message: str = Field(default="")
+    author_id: str | None = Field(default=None)
+    author_name: str | None = Field(default=None)
+    author_profile_url: str | None = Field(default=None)
+    viewers: int = Field(default=0)
+    published_at: datetime = Field(default_factory=datetime.utcnow)
+    # 마지막으로 Liveblocks 목록과 맞춰본 시각
+    indexed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={UUID: str},
+    )
+
+    @field_serializer("id")
+    def serialize_id(self, id: UUID):
+        return str(id)
+
+    class Settings:
+        name = "community_flows"
+        indexes = [
+            IndexModel([("start_message", TEXT)], name="start_message_text"),
+            # 커서 페이지네이션이 같은 값 사이에서도 순서를 유지하도록 _id를 함께 정렬
+            IndexModel([("viewers", DESCENDING), ("_id", DESCENDING)], name="viewers"),
+            IndexModel(
+                [("published_at", DESCENDING), ("_id", DESCENDING)], name="recent"
+            ),
+        ]
@@ -1,16 +1,28 @@
-from pydantic import BaseModel, Field, field_serializer
+import os
+from datetime import datetime
+from beanie import Document
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from uuid import UUID, uuid4
 from typing import List, Dict, Literal
 
+# 이전 스냅샷 기록을 보관하는 기간
+FLOW_VERSION_RETENTION = int(
+    os.getenv("FLOW_VERSION_RETENTION", str(60 * 60 * 24 * 30))
+)
+
 
 class Node(BaseModel):
     id: str
     type: str
-    position: Dict[str, int]
-    measured: Dict[str, int] | dict
+    position: Dict[str, float]
+    measured: Dict[str, int] | dict = Field(default={})
     data: dict
-    selected: bool
-    dragging: bool
+    selected: bool = Field(default=False)
+    dragging: bool = Field(default=False)
+
+    # width, style 등 선언하지 않은 React Flow 필드도 그대로 보존
+    model_config = ConfigDict(extra="allow")
 
 
 class Edge(BaseModel):
@@ -18,17 +30,58 @@ class Edge(BaseModel):
     source: str
     target: str
 
+    model_config = ConfigDict(extra="allow")
+
 
 class EditorOption(BaseModel):
     viewport: Dict[str, int]
 
 
-class Flow(BaseModel):
-    id: UUID = Field(default_factory=uuid4)
+class Flow(Document):
+    id: UUID = Field(default_factory=uuid4, alias="_id")
+    owner_id: str | None = Field(default=None)
+    name: str | None = Field(default=None)
+    # 조회 권한을 로컬에서 확인할 수 있도록 Liveblocks 방의 접근 정보를 함께 저장
+    users_accesses: Dict[str, List[str] | str] = Field(default={})
+    community: bool = Field(default=False)
     editor_option: Dict[str, EditorOption] = Field(default={})
     nodes: List[Node] = Field(default=[])
     edges: List[Edge] = Field(default=[])
+    # 스냅샷이 저장될 때마다 1씩 증가 (이전 내용은 flow_versions에 남음)
+    version: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={UUID: str},
+    )
 
     @field_serializer("id")
     def serialize_id(self, id: UUID):
         return str(id)
+
+    class Settings:
+        name = "flows"
+
+
+
+class FlowVersion(Document):
+    flow_id: UUID
+    nodes: List[Node] = Field(default=[])
+    edges: List[Edge] = Field(default=[])
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "flow_versions"
+        indexes = [
+            IndexModel(
+                [("flow_id", ASCENDING), ("created_at", DESCENDING)],
+                name="flow_created_at",
+            ),
+            IndexModel(
+                [("created_at", ASCENDING)],
+                name="expire_created_at",
+                expireAfterSeconds=FLOW_VERSION_RETENTION,
+            ),
+        ]
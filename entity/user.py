@@ -1,6 +1,15 @@
+from datetime import datetime
 from uuid import UUID, uuid4
-from beanie import Document, Indexed
-from pydantic import ConfigDict, Field, field_serializer
+from beanie import (
+    Document,
+    Indexed,
+    Replace,
+    Save,
+    SaveChanges,
+    Update,
+    after_event,
+)
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
 
 
 class User(Document):
@@ -10,7 +19,8 @@ class User(Document):
     email: str = Indexed(str)
     profile_url: str | None = Field(max_length=100)
     approved: bool = Field(default=False)
-    recent: list[dict[str, str]] = Field(default=[])
+    # 최근 접속한 flow 기록, service.recent에서 최대 개수를 유지하며 갱신
+    recent: list[dict] = Field(default=[])
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -22,5 +32,62 @@ class User(Document):
     def serialize_id(self, id: UUID):
         return str(id)
 
+    @after_event(Replace, Save, SaveChanges, Update)
+    async def invalidate_cached_user(self):
+        # service 계층이 entity를 import하므로 순환 참조를 피하기 위해 지연 import
+        from service.usercache import user_cache
+
+        await user_cache.invalidate_user(str(self.id))
+
     class Settings:
         name = "users"
+
+
+class UserSummary(BaseModel):
+    id: UUID = Field(alias="_id")
+    name: str
+    profile_url: str | None = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    class Settings:
+        projection = {"_id": 1, "name": 1, "profile_url": 1}
+
+
+class UserProfile(BaseModel):
+    # 인증 경로에서 쓰는 프로젝션, 계정이 오래될수록 커지는 recent는 읽지 않음
+    id: UUID = Field(alias="_id")
+    name: str
+    username: str
+    email: str
+    profile_url: str | None = None
+    approved: bool = False
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @field_serializer("id")
+    def serialize_id(self, id: UUID):
+        return str(id)
+
+    class Settings:
+        projection = {
+            "_id": 1,
+            "name": 1,
+            "username": 1,
+            "email": 1,
+            "profile_url": 1,
+            "approved": 1,
+        }
+
+
+class RecentFlow(BaseModel):
+    flow_id: str
+    name: str | None = None
+    visited_at: datetime
+
+
+class UserRecent(BaseModel):
+    recent: list[dict] = Field(default=[])
+
+    class Settings:
+        projection = {"_id": 0, "recent": 1}
@@ -1,17 +1,28 @@
-import asyncio
-import traceback
-
-import aiohttp, logging
-import json, os
+import json
+import logging
+import os
 from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
 from openai import AsyncOpenAI as OpenAI
 
 from service.credential import get_current_user
-from service.notion_log import notionlog
+from service.admission import (
+    Permit,
+    PermitStreamingResponse,
+    brainstorm_admission,
+)
+from service.answercache import answer_cache
+from service.brainstorm import (
+    RECOMMENDED_PROMPTS,
+    BrainstormPipeline,
+    notion_queue,
+    parse_answer,
+)
 from entity.user import User as ODMUser
 
+from utils.jsonstream import JsonFieldStream
 from utils.log import Logger
+from utils.sse import SSE_HEADERS, sse_event, with_heartbeat
 from typing import AsyncGenerator
 
 logger = Logger.create(__name__, level=logging.DEBUG)
@@ -24,187 +35,205 @@ client = OpenAI()
 
 # 환경 변수에서 API 키 로드
 OpenAI.api_key = os.getenv("OPENAI_API_KEY")
-google_api_key = os.getenv("GOOGLE_API_KEY")
-google_search_engine_id = os.getenv("GOOGLE_SEARCH_ENGINE_ID")
 gpt_assistant_id = os.getenv("ASSISTANT_ID")
 
-# 전역 변수로 notion_image_urls 선언
-notion_image_urls = []
-notion_search_urls = []
-
-
-async def search_google_url(api_key, search_engine_id, query, num_results=1):
-    search_url = "https://www.googleapis.com/customsearch/v1"
-    search_params = {
-        "key": api_key,
-        "cx": search_engine_id,
-        "q": query,
-        "num": num_results,
-    }
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(search_url, params=search_params) as response:
-                if response.status != 200:
-                    raise HTTPException(
-                        status_code=response.status,
-                        detail=f"Google API error: {response.reason}",
-                    )
-                results = await response.json()
-                search_urls = [item.get("link") for item in results.get("items", [])]
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"An error occurred while fetching urls: {str(e)}"
-        )
-
-    return search_urls
-
+SSE_HEARTBEAT_INTERVAL = 15
+NOTION_JOB_WAIT = 120
+RUN_FAILED_EVENTS = {
+    "thread.run.failed",
+    "thread.run.cancelled",
+    "thread.run.expired",
+    "thread.run.incomplete",
+}
 
-async def search_google_images(api_key, search_engine_id, query, num_results=3):
-    search_url = "https://www.googleapis.com/customsearch/v1"
-    search_params = {
-        "key": api_key,
-        "cx": search_engine_id,
-        "q": query,
-        "searchType": "image",
-        "num": num_results,
-    }
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(search_url, params=search_params) as response:
-                if response.status != 200:
-                    raise HTTPException(
-                        status_code=response.status,
-                        detail=f"Google API error: {response.reason}",
-                    )
-                results = await response.json()
-                image_urls = [item.get("link") for item in results.get("items", [])]
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"An error occurred while fetching images: {str(e)}"
-        )
-
-    return image_urls
-
-
-async def convert2json(answer):
-    global notion_image_urls
-    global notion_search_urls
-    try:
-        answer = answer.replace("```", "").strip()
-        answer = answer.replace("json", "").strip()
-        json_answer = json.loads(answer.strip())
-        # 이미지 링크
-        if json_answer.get("image_keyword"):
-            image_urls = await search_google_images(
-                google_api_key, google_search_engine_id, json_answer["image_keyword"]
-            )
-            json_answer["image_urls"] = image_urls
-            notion_image_urls = image_urls
-        # 참조 링크
-        if json_answer.get("search_keyword"):
-            for keyword in json_answer["search_keyword"]:
-                search_urls = await search_google_url(
-                    google_api_key, google_search_engine_id, keyword
-                )
-                json_answer["search_urls"] += search_urls
-                notion_search_urls += search_urls
-        # 텍스트 반환
-        if json_answer.get("summary"):
-            context = json_answer.get("summary")
-            context += "\n\n Reference Links:"
-            for url in notion_search_urls:
-                context += f"\n{url}"
-
-            context += "\n\n Image Links:"
-            for url in notion_image_urls:
-                context += f"\n{url}"
-
-            json_answer["summary"] = context
-
-        return json_answer
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Failed to decode JSON response.")
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"An error occurred during JSON conversion: {str(e)}",
-        )
-
-
-async def notionlogformat(json_answer):
-    global notion_image_urls
-    global notion_search_urls
-    # print(f"notion_image_urls: {notion_image_urls}")
-    main_title = json_answer.get("main_title")
-    markdown_content = json_answer.get("markdown")
-    print("노션에 기록중...")
-    notion_url = await notionlog(
-        main_title, markdown_content, notion_image_urls, notion_search_urls
+async def generate_answer(prompt: str) -> str:
+    # 스트리밍 없이 답변 전체를 받아옴 (추천 프롬프트 답변 캐시 예열용)
+    thread = await client.beta.threads.create(
+        messages=[{"role": "user", "content": prompt}]
     )
-    return notion_url
-
+    run = await client.beta.threads.runs.create_and_poll(
+        thread_id=thread.id, assistant_id=gpt_assistant_id
+    )
+    if run.status != "completed":
+        raise RuntimeError(f"Run ended with {run.status}")
+    messages = await client.beta.threads.messages.list(
+        thread_id=thread.id, run_id=run.id
+    )
+    answer = "".join(
+        content.text.value
+        for message in messages.data
+        if message.role == "assistant"
+        for content in message.content
+        if content.type == "text"
+    )
+    # 파싱할 수 없는 답변은 캐시하지 않음
+    parse_answer(answer)
+    return answer
+
+
+async def start_answer_cache() -> None:
+    await answer_cache.start(RECOMMENDED_PROMPTS, gpt_assistant_id, generate_answer)
+
+
+async def stream_assistant(
+    prompt: str,
+    thread_id: str,
+    cached_answer: str | None = None,
+    cache_answer: bool = False,
+    permit: Permit | None = None,
+) -> AsyncGenerator[str, None]:
+    pipeline = BrainstormPipeline()
+    parser: JsonFieldStream | None = JsonFieldStream()
+
+    def parse_fields(text: str) -> list[str]:
+        # 닫힌 최상위 필드를 바로 내보내고 검색을 미리 시작
+        nonlocal parser
+        if parser is None:
+            return []
+        try:
+            fields = parser.feed(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"[{thread_id}] Incremental parse stopped: {e}")
+            parser = None
+            return []
+        events = []
+        for name, value in fields:
+            pipeline.on_field(name, value)
+            events.append(sse_event("field", {"name": name, "value": value}))
+        return events
 
-async def stream_assistant(prompt: str, thread_id: str) -> AsyncGenerator[str, None]:
     try:
-        _message = await client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user",
-            content=prompt,
-        )
-        run = await client.beta.threads.runs.create_and_poll(
-            thread_id=thread_id,
-            assistant_id=gpt_assistant_id,
-        )
-        logger.info(f"Run ID: {run.id}")
-        while True:
-            run = await client.beta.threads.runs.retrieve(
-                thread_id=thread_id, run_id=run.id
+        yield sse_event("thread", {"thread_id": thread_id})
+        if cached_answer is not None:
+            answer = cached_answer
+            yield sse_event("delta", {"text": answer})
+            for event in parse_fields(answer):
+                yield event
+        else:
+            _message = await client.beta.threads.messages.create(
+                thread_id=thread_id,
+                role="user",
+                content=prompt,
             )
-            logger.info(f"[{thread_id}, Run status: {run.status}")
-            if run.status == "completed":
-                break
-            await asyncio.sleep(1)
-        messages = await client.beta.threads.messages.list(
-            thread_id=thread_id, run_id=run.id
-        )
-        json_answer = await convert2json(messages.data[0].content[0].text.value)
-
-        if json_answer.get("status") == "markdown":
-            json_answer = await notionlogformat(json_answer)
-
-        yield str(
-            json.dumps(
-                {
-                    "status": "completed",
-                    "thread_id": thread_id,
-                    "result": json_answer,
-                },
-                ensure_ascii=False,
-                indent=2,
+            answer_parts = []
+            stream = await client.beta.threads.runs.create(
+                thread_id=thread_id,
+                assistant_id=gpt_assistant_id,
+                stream=True,
             )
+            async for event in stream:
+                if event.event == "thread.run.created":
+                    logger.info(f"[{thread_id}] Run ID: {event.data.id}")
+                elif event.event == "thread.message.delta":
+                    for content in event.data.delta.content or []:
+                        if (
+                            content.type == "text"
+                            and content.text
+                            and content.text.value
+                        ):
+                            answer_parts.append(content.text.value)
+                            yield sse_event("delta", {"text": content.text.value})
+                            for field_event in parse_fields(content.text.value):
+                                yield field_event
+                elif event.event in RUN_FAILED_EVENTS:
+                    raise RuntimeError(f"Run ended with {event.event}")
+            logger.info(f"[{thread_id}] Run completed")
+            answer = "".join(answer_parts)
+
+        json_answer = await pipeline.run(answer)
+        # 답변이 정상적으로 파싱된 뒤에만 캐시
+        if cache_answer:
+            await answer_cache.put(prompt, gpt_assistant_id, answer)
+
+        yield sse_event(
+            "completed",
+            {
+                "status": "completed",
+                "thread_id": thread_id,
+                "result": json_answer,
+                "cached": cached_answer is not None,
+            },
         )
+        # 모델 응답이 끝났으므로 노션 기록을 기다리는 동안에는 슬롯을 잡지 않음
+        if permit is not None:
+            await permit.release()
+
+        if json_answer.get("notion_job_id"):
+            job = await notion_queue.wait(
+                json_answer["notion_job_id"], timeout=NOTION_JOB_WAIT
+            )
+            yield sse_event("notion", job)
 
     except Exception as e:
-        print(e)
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+        logger.exception(f"[{thread_id}] Brainstorm stream failed")
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield sse_event("error", {"status": "error", "detail": detail})
 
 
 @router.get("/stream")
 async def brainstorm(
     thread_id: str = Query(..., title="Thread ID"),
     prompt: str = Query(..., title="Prompt"),
-    _user: "ODMUser" = Depends(get_current_user),
+    no_cache: bool = Query(False, title="Bypass answer cache"),
+    user: "ODMUser" = Depends(get_current_user),
 ):
     if thread_id is None:
         raise HTTPException(status_code=400, detail="Thread ID is required.")
-    if thread_id == "new":
-        new_thread = await client.beta.threads.create()
-        thread_id = new_thread.id
-    print("hello")
+    # 이전 대화 맥락이 없는 새 스레드의 답변만 캐시에서 꺼내거나 저장
+    new_thread = thread_id == "new"
+    if new_thread and not no_cache:
+        cached_answer = await answer_cache.get(prompt, gpt_assistant_id)
+        if cached_answer is not None:
+            # 이어지는 질문이 맥락을 갖도록 캐시된 답변을 스레드에 기록
+            thread = await client.beta.threads.create(
+                messages=[
+                    {"role": "user", "content": prompt},
+                    {"role": "assistant", "content": cached_answer},
+                ]
+            )
+            return StreamingResponse(
+                with_heartbeat(
+                    stream_assistant(prompt, thread.id, cached_answer=cached_answer),
+                    SSE_HEARTBEAT_INTERVAL,
+                ),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS,
+            )
 
-    return StreamingResponse(
-        stream_assistant(prompt, thread_id), media_type="text/event-stream"
+    # 한도를 넘으면 429/503과 Retry-After로 거절하고, 통과하면 답변이 끝날 때 반환
+    permit = await brainstorm_admission.admit(str(user.id))
+    try:
+        if new_thread:
+            thread = await client.beta.threads.create()
+            thread_id = thread.id
+    except Exception:
+        await permit.release()
+        raise
+    logger.info(f"[{thread_id}] Brainstorm stream started")
+
+    return PermitStreamingResponse(
+        with_heartbeat(
+            stream_assistant(
+                prompt, thread_id, cache_answer=new_thread, permit=permit
+            ),
+            SSE_HEARTBEAT_INTERVAL,
+        ),
+        permit=permit,
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
     )
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    _user: "ODMUser" = Depends(get_current_user),
+):
+    job = await notion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "JOB_NOT_FOUND", "message": "Job not found"},
+        )
+    return {"message": "Job found", "data": job}
@@ -1,16 +1,26 @@
-import asyncio
 import logging, uuid
 import gdshortener
 import random
-from fastapi import APIRouter, Depends, status, Query
+import time
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi_restful.cbv import cbv
 from entity.user import User as ODMUser
 from service.liveblock import liveblock
+from service.brainstorm import RECOMMENDED_PROMPTS
+from service.community import CommunitySort, InvalidCursor, community_index
+from service.flowstore import flow_snapshots, room_fields
+from service.projects import InvalidProjectCursor, project_list
+from service.recent import get_recent_flows
 from service.credential import get_current_user
 from utils.log import Logger
+from utils.metrics import Histogram
 
 logger = Logger.create(__name__, level=logging.DEBUG)
 
+flow_create_stage_seconds = Histogram(
+    "flow_create_stage_seconds", "Wall time of each flow creation stage"
+)
+
 router = APIRouter(
     prefix="/flows",
     tags=["Flows"],
@@ -25,6 +35,7 @@ class Flow:
     async def create_flow(
         self,
         prompt: str,
+        response: Response,
         user: "ODMUser" = Depends(get_current_user),
     ):
         new_flow_id = uuid.uuid4()
@@ -51,7 +62,9 @@ class Flow:
                 "data": [],
             },
         }
-        await liveblock.create_room(
+        timings = {}
+        started = time.perf_counter()
+        room = await liveblock.create_room(
             room_id=str(new_flow_id),
             default_permission=[],
             user_permission={str(user.id): ["room:write"]},
@@ -62,12 +75,48 @@ class Flow:
                 "start_message": prompt,
             },
         )
-        await asyncio.sleep(1)
-        await liveblock.set_document(
+        timings["create_room"] = time.perf_counter() - started
+        if room.get("id") != str(new_flow_id):
+            logger.error(f"Failed to create room {new_flow_id}: {room}")
+            raise HTTPException(
+                status_code=502,
+                detail={
+                    "error": "ROOM_CREATE_FAILED",
+                    "message": "Failed to create flow",
+                },
+            )
+        started = time.perf_counter()
+        document = await liveblock.set_document_when_ready(
             room_id=str(new_flow_id),
             document=create_flow_model,
         )
-        logger.info(f"Create flow: {str(new_flow_id)}")
+        timings["set_document"] = time.perf_counter() - started
+        # 저장소가 비어 있는 방은 스냅샷과 프로젝트 목록에 넣지 않음
+        if "error" in document:
+            logger.error(f"Failed to set document of room {new_flow_id}: {document}")
+            raise HTTPException(
+                status_code=502,
+                detail={
+                    "error": "DOCUMENT_SET_FAILED",
+                    "message": "Failed to create flow",
+                },
+            )
+        flow_snapshots.put(
+            str(new_flow_id),
+            nodes=create_flow_model["nodes"]["data"],
+            edges=[],
+            **room_fields(room),
+        )
+        await project_list.invalidate(str(user.id))
+        for stage, elapsed in timings.items():
+            flow_create_stage_seconds.observe(elapsed, stage=stage)
+        response.headers["Server-Timing"] = ", ".join(
+            f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in timings.items()
+        )
+        logger.info(
+            f"Create flow: {str(new_flow_id)} "
+            + " ".join(f"{stage}={elapsed:.3f}s" for stage, elapsed in timings.items())
+        )
         return {"message": "Create flow", "data": str(new_flow_id)}
 
     @router.get("/community")
@@ -75,25 +124,89 @@ class Flow:
         self,
         limit: int = Query(..., ge=1, le=100),
         query: str = Query(None),
+        sort: CommunitySort = Query("recent"),
+        cursor: str = Query(None),
     ):
-        kwargs_data = {"limit": limit, "groupIds": ["community"]}
-        if query:
-            kwargs_data["query"] = query
-        result = await liveblock.search_rooms(**kwargs_data)
+        try:
+            flows, next_cursor = await community_index.search(
+                limit=limit, sort=sort, query=query, cursor=cursor
+            )
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "INVALID_CURSOR", "message": "Invalid cursor"},
+            )
         return_data = []
-        for flow in result.data.values():
+        for flow in flows:
             return_data.append(
                 {
-                    "id": str(flow["id"]),
-                    "name": flow["metadata"]["start_message"],
-                    "author_name": flow["metadata"]["owner_name"],
-                    "author_profile_url": flow["metadata"]["owner_profile_url"],
-                    "viewers": flow["metadata"]["viewers"],
+                    "id": str(flow.id),
+                    "name": flow.start_message,
+                    "author_name": flow.author_name,
+                    "author_profile_url": flow.author_profile_url,
+                    "viewers": flow.viewers,
                 }
             )
         return {
             "message": "Community flows",
             "data": return_data,
+            "next_cursor": next_cursor,
+        }
+
+    @router.get("/{flow_id}/preview")
+    async def get_flow_preview(self, flow_id: str):
+        # 스냅샷에 함께 저장된 접근 정보로 권한을 확인해 로컬에서 응답
+        flow = await flow_snapshots.load(flow_id)
+        if flow is None:
+            raise HTTPException(
+                status_code=404,
+                detail={"error": "FLOW_NOT_FOUND", "message": "Flow not found"},
+            )
+        if not flow.community:
+            raise HTTPException(
+                status_code=403,
+                detail={
+                    "error": "COMMUNITY_PERMISSION_DENIED",
+                    "message": "Permission Denied",
+                },
+            )
+        return {
+            "message": "Flow preview",
+            "data": flow.model_dump(
+                include={"id", "name", "nodes", "edges", "version", "updated_at"}
+            ),
+        }
+
+    @router.get("/{flow_id}/export")
+    async def export_flow(
+        self,
+        flow_id: str,
+        user: "ODMUser" = Depends(get_current_user),
+    ):
+        flow = await flow_snapshots.load(flow_id)
+        if flow is None:
+            raise HTTPException(
+                status_code=404,
+                detail={"error": "FLOW_NOT_FOUND", "message": "Flow not found"},
+            )
+        if flow.users_accesses.get(str(user.id)) is None:
+            raise HTTPException(
+                status_code=403,
+                detail={"error": "PERMISSION_DENIED", "message": "Permission Denied"},
+            )
+        return {
+            "message": "Export flow",
+            "data": flow.model_dump(
+                include={
+                    "id",
+                    "name",
+                    "editor_option",
+                    "nodes",
+                    "edges",
+                    "version",
+                    "updated_at",
+                }
+            ),
         }
 
     @router.get("/recommend")
@@ -103,11 +216,7 @@ class Flow:
     ):
         return {
             "message": "Recommend prompt",
-            "data": [
-                "자율주행 자동차 프로젝트",
-                "파이썬으로 머신러닝 공부하기",
-                "환경 보호화 관련된 웹사이트",
-            ],
+            "data": RECOMMENDED_PROMPTS,
         }
 
     @router.get("/shorturl")
@@ -123,22 +232,23 @@ class Flow:
     @router.get("/")
     async def get_my_project_flows(
         self,
+        limit: int = Query(50, ge=1, le=100),
+        cursor: str = Query(None),
         user: "ODMUser" = Depends(get_current_user),
     ):
-        result = await liveblock.search_rooms(
-            userId=str(user.id),
-        )
-        return_data = []
-        for flow in result["data"]:
-            return_data.append(
-                {
-                    "id": str(flow["id"]),
-                    "name": flow["metadata"]["start_message"],
-                }
+        try:
+            return_data, next_cursor = await project_list.page(
+                str(user.id), cursor, limit
+            )
+        except InvalidProjectCursor:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "INVALID_CURSOR", "message": "Invalid cursor"},
             )
         return {
             "message": "Project flows",
             "data": return_data,
+            "next_cursor": next_cursor,
         }
 
     @router.get("/recent")
@@ -148,5 +258,5 @@ class Flow:
     ):
         return {
             "message": "Recent flows",
-            "data": user.recent[::-1],
+            "data": await get_recent_flows(user.id),
         }
@@ -4,11 +4,16 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi_restful.cbv import cbv
 from entity.user import User as ODMUser
 from service.liveblock import liveblock
+from service.community import community_index
+from service.flowstore import flow_snapshots
+from service.projects import project_list
+from service.recent import record_visit
 from service.credential import get_current_user
+from service.userlookup import resolve_users
 from utils.log import Logger
 from pydantic import BaseModel
 
-logger = Logger.create(__name__, level=logging.DEBUG)
+logger = Logger.create(__name__, level=logging.DEBUG, sample_rate=0.1)
 
 router = APIRouter(
     prefix="/realtime",
@@ -31,7 +36,7 @@ class Flow:
         community: bool = Query(False),
         current_user: "ODMUser" = Depends(get_current_user),
     ):
-        fetch_room_data = await liveblock.fetch_room(flow_id)
+        fetch_room_data = await liveblock.get_room(flow_id)
         if fetch_room_data.get("error") == "ROOM_NOT_FOUND":
             raise HTTPException(status_code=404, detail="Flow not found")
         if community:
@@ -43,6 +48,20 @@ class Flow:
                         "message": "Permission Denied",
                     },
                 )
+        elif fetch_room_data["usersAccesses"].get(str(current_user.id)) is None:
+            raise HTTPException(
+                status_code=403,
+                detail={
+                    "error": "PERMISSION_DENIED",
+                    "message": "Permission Denied",
+                },
+            )
+        # 권한이 확인된 flow만 최근 기록과 스냅샷 대상(편집 중)에 넣음
+        await flow_snapshots.touch(flow_id)
+        await record_visit(
+            current_user.id, flow_id, fetch_room_data["metadata"].get("start_message")
+        )
+        if community:
             liveblock_access_token = await liveblock.create_token(
                 odm_user=current_user, groups=["community"]
             )
@@ -57,14 +76,6 @@ class Flow:
                 },
             }
         else:
-            if fetch_room_data["usersAccesses"].get(str(current_user.id)) is None:
-                raise HTTPException(
-                    status_code=403,
-                    detail={
-                        "error": "PERMISSION_DENIED",
-                        "message": "Permission Denied",
-                    },
-                )
             liveblock_access_token = await liveblock.create_token(odm_user=current_user)
             logger.info(
                 f"User {current_user.username} joined realtime session({flow_id}.private)"
@@ -103,8 +114,8 @@ class Flow:
         flow_id: str,
         current_user: "ODMUser" = Depends(get_current_user),
     ):
-        fetch_room_data = await liveblock.fetch_room(flow_id)
-        print(fetch_room_data)
+        fetch_room_data = await liveblock.get_room(flow_id)
+        logger.debug(f"Publish flow {flow_id}: {fetch_room_data}")
         if fetch_room_data.get("error") == "ROOM_NOT_FOUND":
             raise HTTPException(
                 status_code=404,
@@ -115,11 +126,14 @@ class Flow:
                 status_code=403,
                 detail={"error": "PERMISSION_DENIED", "message": "Permission Denied"},
             )
-        await liveblock.update_room(
+        room = await liveblock.update_room(
             room_id=flow_id, groupsAccesses={
                 "community": ["room:write"]
             }
         )
+        if "error" not in room:
+            await community_index.publish(room)
+            await flow_snapshots.invalidate(flow_id)
         return {"code": "DOCUMENT_PUBLISHED", "message": "Document published"}
 
     @router.get("/{flow_id}/invite")
@@ -128,21 +142,25 @@ class Flow:
         flow_id: str,
         current_user: "ODMUser" = Depends(get_current_user),
     ):
-        fetch_room_data = await liveblock.fetch_room(flow_id)
+        fetch_room_data = await liveblock.get_room(flow_id)
         if fetch_room_data.get("error") == "ROOM_NOT_FOUND":
             raise HTTPException(
                 status_code=404,
                 detail={"error": "FLOW_NOT_FOUND", "message": "Flow not found"},
             )
-        if fetch_room_data.usersAccesses.get(str(current_user.id)) is None:
+        if fetch_room_data["usersAccesses"].get(str(current_user.id)) is None:
             raise HTTPException(
                 status_code=403,
                 detail={"error": "PERMISSION_DENIED", "message": "Permission Denied"},
             )
+        users_accesses = fetch_room_data["usersAccesses"]
+        users = await resolve_users(
+            user_id for user_id in users_accesses if user_id != str(current_user.id)
+        )
         invite_list = []
-        for user_id, permission in fetch_room_data["usersAccesses"].items():
-            if user_id != str(current_user.id):
-                user = await ODMUser.get(document_id=user_id)
+        for user_id, permission in users_accesses.items():
+            user = users.get(user_id)
+            if user is not None:
                 invite_list.append(
                     {
                         "user_name": user.name,
@@ -164,13 +182,13 @@ class Flow:
         invite_user: InviteUser,
         current_user: "ODMUser" = Depends(get_current_user),
     ):
-        fetch_room_data = await liveblock.fetch_room(flow_id)
+        fetch_room_data = await liveblock.get_room(flow_id)
         if fetch_room_data.get("error") == "ROOM_NOT_FOUND":
             raise HTTPException(
                 status_code=404,
                 detail={"error": "FLOW_NOT_FOUND", "message": "Flow not found"},
             )
-        if fetch_room_data.usersAccesses.get(str(current_user.id)) is None:
+        if fetch_room_data["usersAccesses"].get(str(current_user.id)) is None:
             raise HTTPException(
                 status_code=403,
                 detail={"error": "PERMISSION_DENIED", "message": "Permission Denied"},
@@ -188,8 +206,10 @@ class Flow:
             flow_id,
             defaultAccesses=fetch_room_data["defaultAccesses"],
             groupsAccesses=fetch_room_data["groupsAccesses"],
-            userAccesses=fetch_room_data["usersAccesses"],
+            usersAccesses=fetch_room_data["usersAccesses"],
         )
+        await project_list.invalidate(str(target_user.id))
+        await flow_snapshots.invalidate(flow_id)
         return {
             "code": "PERMISSION_UPDATED",
             "message": "User permission updated",
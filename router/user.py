@@ -1,10 +1,10 @@
+import logging
 import os
 from datetime import datetime, timedelta
 
 import aiogoogle.excs
 from dotenv import load_dotenv
 
-import traceback
 from fastapi import APIRouter, HTTPException, Depends, Body, Request
 from fastapi.responses import RedirectResponse
 from fastapi_restful.cbv import cbv
@@ -14,7 +14,9 @@ from entity.user import User as ODMUser
 from aiogoogle import Aiogoogle, auth as aiogoogle_auth
 
 from service.credential import depends_credential, Credential, get_current_user
-from service.usersession import UserSession as Session
+from utils.log import Logger
+
+logger = Logger.create(__name__, level=logging.DEBUG)
 
 load_dotenv(verbose=True)
 router = APIRouter(prefix="/user", tags=["user"])
@@ -26,7 +28,6 @@ GOOGLE_CLIENT_CREDS = aiogoogle_auth.creds.ClientCreds(
     redirect_uri=os.getenv("GOOGLE_REDIRECT_URI"),
 )
 GOOGLE_STATE = os.urandom(10).hex()
-print(GOOGLE_STATE)
 
 
 @cbv(router)
@@ -92,22 +93,18 @@ class User:
                 expire=access_token_expires,
                 token=access_token,
                 user_id=str(odm_user.id),
+                session_data={},
             )
             token_expired_time = datetime.now() + access_token_expires
-            session = Session(token=access_token)
-            await session.set_expire(access_token_expires)
-            await session.update({})
 
             return {
                 "message": "Login Success",
                 "token": access_token,
                 "expired": int(token_expired_time.timestamp()),
             }
-        except Exception as e:
-            traceback.print_exception(e)
-            raise HTTPException(
-                status_code=500, detail="Internal Server Error, " + str(e)
-            )
+        except Exception:
+            logger.exception(f"Failed to register token for user {odm_user.id}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
 
     @router.post("/logout", description="로그아웃하기 (토큰 만료시키기)")
     async def logout(
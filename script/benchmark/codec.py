@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import json
+import time
+
+from entity.flow import Edge, Node
+from utils import codec
+
+
+def generate_flow(node_count: int) -> dict:
+    nodes = [
+        Node(
+            id=f"node-{index}",
+            type="aiStartupNode" if index == 0 else "ideaNode",
+            position={"x": index % 50 * 320, "y": index // 50 * 180},
+            measured={"width": 260, "height": 140},
+            data={
+                "text": f"아이디어 {index}: 자율주행 자동차 프로젝트의 세부 주제",
+                "isAllowEditing": True,
+            },
+            selected=False,
+            dragging=False,
+        )
+        for index in range(node_count)
+    ]
+    edges = [
+        Edge(id=f"edge-{index}", source=f"node-{index // 3}", target=f"node-{index}")
+        for index in range(1, node_count)
+    ]
+    return {
+        "nodes": [node.model_dump() for node in nodes],
+        "edges": [edge.model_dump() for edge in edges],
+    }
+
+
+VARIANTS = {
+    "legacy json.dumps": (
+        lambda value: json.dumps(value).encode(),
+        lambda raw: json.loads(raw),
+    ),
+    "json": (
+        lambda value: codec.encode(value, "json", compress_threshold=None),
+        codec.decode,
+    ),
+    "json+zstd": (
+        lambda value: codec.encode(value, "json", compress_threshold=0),
+        codec.decode,
+    ),
+    "msgpack": (
+        lambda value: codec.encode(value, "msgpack", compress_threshold=None),
+        codec.decode,
+    ),
+    "msgpack+zstd": (
+        lambda value: codec.encode(value, "msgpack", compress_threshold=0),
+        codec.decode,
+    ),
+}
+
+
+def available(name: str) -> bool:
+    if "msgpack" in name and codec.msgpack is None:
+        return False
+    if "zstd" in name and codec.zstandard is None:
+        return False
+    return True
+
+
+async def redis_memory(samples: dict[str, bytes]) -> dict[str, int]:
+    from app.redisconn import close_redis_pool, get_redis_pool
+
+    redis = get_redis_pool()
+    usage = {}
+    try:
+        for name, raw in samples.items():
+            key = f"benchmark:codec:{name}"
+            await redis.set(key, raw)
+            usage[name] = await redis.memory_usage(key)
+            await redis.delete(key)
+    finally:
+        await close_redis_pool()
+    return usage
+
+
+def bench(node_count: int, rounds: int, use_redis: bool) -> None:
+    flow = generate_flow(node_count)
+    print(f"{node_count:,} nodes")
+    samples = {}
+    for name, (encode, decode) in VARIANTS.items():
+        if not available(name):
+            print(f"  {name:<18} skipped (optional dependency missing)")
+            continue
+        started = time.perf_counter()
+        for _ in range(rounds):
+            raw = encode(flow)
+        encode_ms = (time.perf_counter() - started) / rounds * 1000
+        started = time.perf_counter()
+        for _ in range(rounds):
+            decode(raw)
+        decode_ms = (time.perf_counter() - started) / rounds * 1000
+        samples[name] = raw
+        print(
+            f"  {name:<18} {len(raw) / 1024:9.1f} KiB"
+            f"  encode {encode_ms:7.2f} ms  decode {decode_ms:7.2f} ms"
+        )
+    if use_redis:
+        for name, usage in asyncio.run(redis_memory(samples)).items():
+            print(f"  {name:<18} redis MEMORY USAGE {usage / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Storage codec comparison")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument(
+        "--redis", action="store_true", help="measure MEMORY USAGE on REDIS_HOST"
+    )
+    args = parser.parse_args()
+    for node_count in args.nodes:
+        bench(node_count, args.rounds, args.redis)
@@ -0,0 +1,89 @@
+import argparse
+import random
+import time
+
+from utils.flow import FlowGraph, exist_node_in, update_dict_in_list
+
+
+def generate_flow(node_count: int) -> dict:
+    nodes = [
+        {
+            "id": f"node-{index}",
+            "type": "ideaNode",
+            "measured": {"width": 240, "height": 120},
+            "position": {"x": index % 100 * 300, "y": index // 100 * 200},
+            "data": {"text": f"idea {index}", "isAllowEditing": True},
+            "selected": False,
+            "dragging": False,
+        }
+        for index in range(node_count)
+    ]
+    edges = [
+        {
+            "id": f"edge-{index}",
+            "source": f"node-{index // 2}",
+            "target": f"node-{index}",
+        }
+        for index in range(1, node_count)
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+
+def timed(label: str, operations: int, fn) -> float:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    rate = operations / elapsed
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms  ({rate:,.0f} ops/s)")
+    return elapsed
+
+
+def bench(node_count: int, updates: int, linear_updates: int) -> None:
+    rng = random.Random(node_count)
+    flow = generate_flow(node_count)
+    targets = [f"node-{rng.randrange(node_count)}" for _ in range(updates)]
+    print(f"{node_count:,} nodes / {node_count - 1:,} edges")
+
+    def linear():
+        for node_id in targets[:linear_updates]:
+            if exist_node_in(flow, node_id):
+                update_dict_in_list(
+                    flow["nodes"], node_id, {"x": 1, "y": 2}, "position"
+                )
+
+    linear_elapsed = timed("list scan update", linear_updates, linear)
+
+    graph = None
+
+    def build():
+        nonlocal graph
+        graph = FlowGraph.from_dict(flow)
+
+    timed("FlowGraph.from_dict", node_count, build)
+
+    def indexed():
+        for node_id in targets:
+            if graph.has_node(node_id):
+                graph.update_node(node_id, {"x": 1, "y": 2}, key="position")
+
+    indexed_elapsed = timed("FlowGraph update", updates, indexed)
+
+    def adjacency():
+        for node_id in targets:
+            graph.outgoing(node_id)
+            graph.incoming(node_id)
+
+    timed("FlowGraph adjacency lookup", updates * 2, adjacency)
+    timed("FlowGraph.to_dict", node_count, graph.to_dict)
+    speedup = (linear_elapsed / linear_updates) / (indexed_elapsed / updates)
+    print(f"  per-update speedup: {speedup:,.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FlowGraph vs list scans")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--updates", type=int, default=100_000)
+    parser.add_argument("--linear-updates", type=int, default=1_000)
+    args = parser.parse_args()
+    for node_count in args.nodes:
+        bench(node_count, args.updates, args.linear_updates)
@@ -0,0 +1,119 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from utils.log import LogPipeline, SamplingFilter, request_id_var
+
+
+class SlowStream:
+    # 느린 디스크나 막힌 stdout 파이프를 흉내 냄
+    def __init__(self, path: str, latency: float):
+        self.file = open(path, "a", encoding="utf-8")
+        self.latency = latency
+
+    def write(self, text: str) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        self.file.write(text)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+
+def legacy_logger(name: str, directory: str, stream: SlowStream) -> logging.Logger:
+    # 기존 Logger.create: 호출할 때마다 핸들러가 늘고, 기록은 호출한 스레드에서 바로 씀
+    legacy = logging.getLogger(name)
+    legacy.setLevel(logging.DEBUG)
+    legacy.propagate = False
+    for _ in range(2):
+        legacy.addHandler(logging.StreamHandler(stream))
+        legacy.addHandler(logging.FileHandler(os.path.join(directory, f"{name}.log")))
+    return legacy
+
+
+def pipeline_logger(
+    name: str, directory: str, stream: SlowStream, sample_rate: float | None = None
+) -> tuple[logging.Logger, LogPipeline]:
+    pipeline = LogPipeline(log_format="json", stream=stream, log_dir=directory)
+    pipelined = logging.getLogger(name)
+    pipelined.setLevel(logging.DEBUG)
+    for _ in range(2):
+        pipeline.attach(pipelined)
+    pipeline.route_file(name, name)
+    if sample_rate is not None:
+        pipelined.addFilter(SamplingFilter(sample_rate))
+    return pipelined, pipeline
+
+
+def count_lines(path: str) -> int:
+    with open(path, encoding="utf-8") as file:
+        return sum(1 for _ in file)
+
+
+def run(label: str, target: logging.Logger, records: int, level: int) -> float:
+    started = time.perf_counter()
+    for index in range(records):
+        target.log(level, "flow %s updated by %s", index, "user")
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {label:<26} caller {elapsed * 1000:9.1f} ms"
+        f"  ({records / elapsed:,.0f} records/s)"
+    )
+    return elapsed
+
+
+def bench(records: int, latency: float) -> None:
+    print(f"{records:,} records, sink latency {latency * 1000:.2f} ms")
+    request_id_var.set("benchmark")
+    with tempfile.TemporaryDirectory() as directory:
+        stream = SlowStream(os.path.join(directory, "legacy.out"), latency)
+        legacy = legacy_logger("legacy", directory, stream)
+        run("legacy (sync, duplicated)", legacy, records, logging.INFO)
+        stream.flush()
+        print(
+            f"  {'':<26} lines written "
+            f"{count_lines(os.path.join(directory, 'legacy.out')):,}"
+        )
+
+        stream = SlowStream(os.path.join(directory, "pipeline.out"), latency)
+        pipelined, pipeline = pipeline_logger("pipeline", directory, stream)
+        pipeline.start()
+        caller = run("queue pipeline (json)", pipelined, records, logging.INFO)
+        started = time.perf_counter()
+        pipeline.stop()
+        drained = time.perf_counter() - started
+        print(
+            f"  {'':<26} drain  {drained * 1000:9.1f} ms"
+            f"  (end-to-end {records / (caller + drained):,.0f} records/s)"
+        )
+        print(
+            f"  {'':<26} lines written "
+            f"{count_lines(os.path.join(directory, 'pipeline.out')):,}"
+        )
+
+        stream = SlowStream(os.path.join(directory, "sampled.out"), latency)
+        sampled, pipeline = pipeline_logger("sampled", directory, stream, 0.1)
+        pipeline.start()
+        run("queue pipeline, debug 10%", sampled, records, logging.DEBUG)
+        pipeline.stop()
+        print(
+            f"  {'':<26} lines written "
+            f"{count_lines(os.path.join(directory, 'sampled.out')):,}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Logging pipeline throughput")
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        nargs="+",
+        default=[0.0, 0.0001],
+        help="seconds each sink write blocks for",
+    )
+    args = parser.parse_args()
+    for latency in args.latency:
+        bench(args.records, latency)
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+
+FAKE_NOTION_PORT = 8091
+os.environ.setdefault("NOTION_API_URL", f"http://127.0.0.1:{FAKE_NOTION_PORT}")
+
+from service.notion_blocks import compile_markdown
+from service.notion_log import build_children, create_page_with_images
+from utils.request import close_shared_session
+
+
+def generate_markdown(sections: int) -> str:
+    rng = random.Random(7)
+    words = "spark 아이디어 flow node edge 브레인스토밍 project notion".split()
+    lines = []
+    for index in range(sections):
+        lines.append(f"## Section {index}")
+        lines.append(" ".join(rng.choices(words, k=rng.randint(20, 400))))
+        lines.extend(f"- item {index}.{item}" for item in range(rng.randint(2, 8)))
+        lines.append(f"See [reference {index}](https://example.com/{index}) for more")
+        if index % 5 == 0:
+            lines.extend(["```python", "print('spark')\n" * 40, "```"])
+    return "\n".join(lines)
+
+
+def bench_compile(markdown: str, rounds: int) -> None:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        blocks = compile_markdown(markdown)
+    elapsed = (time.perf_counter() - started) / rounds
+    print(
+        f"compile: {len(markdown) / 1024:.0f} KiB -> {len(blocks)} blocks "
+        f"in {elapsed * 1000:.1f} ms ({len(markdown) / elapsed / 1024 / 1024:.1f} MiB/s)"
+    )
+
+
+async def bench_write(markdown: str, rounds: int, latency: float) -> None:
+    from aiohttp import web
+
+    from script.notion.fake_server import create_app
+
+    runner = web.AppRunner(create_app(fail_first=0, latency=latency))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", FAKE_NOTION_PORT).start()
+    try:
+        blocks = len(build_children(markdown, [], []))
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await create_page_with_images("benchmark", markdown, [], [])
+        elapsed = (time.perf_counter() - started) / rounds
+        print(
+            f"write: {blocks} blocks in {elapsed * 1000:.1f} ms per page "
+            f"({blocks / elapsed:.0f} blocks/s, {latency * 1000:.0f} ms fake latency)"
+        )
+    finally:
+        await close_shared_session()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notion block compiler/writer")
+    parser.add_argument("--sections", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--skip-write", action="store_true")
+    args = parser.parse_args()
+
+    markdown = generate_markdown(args.sections)
+    bench_compile(markdown, args.rounds)
+    if not args.skip_write:
+        asyncio.run(bench_write(markdown, args.rounds, args.latency))
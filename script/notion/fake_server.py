@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import uuid
+
+from aiohttp import web
+
+# NOTION_API_URL=http://localhost:8090 으로 실행하면 notion 작업이 이 서버로 전송됨
+
+
+def create_app(fail_first: int, latency: float) -> web.Application:
+    state = {"requests": 0, "pages": {}}
+
+    async def maybe_fail(request: web.Request) -> web.Response | None:
+        state["requests"] += 1
+        await asyncio.sleep(latency)
+        if state["requests"] <= fail_first:
+            return web.json_response(
+                {"object": "error", "code": "service_unavailable"}, status=503
+            )
+        return None
+
+    async def create_page(request: web.Request) -> web.Response:
+        if failure := await maybe_fail(request):
+            return failure
+        payload = await request.json()
+        page_id = str(uuid.uuid4())
+        state["pages"][page_id] = payload.get("children", [])
+        return web.json_response({"object": "page", "id": page_id})
+
+    async def append_children(request: web.Request) -> web.Response:
+        if failure := await maybe_fail(request):
+            return failure
+        payload = await request.json()
+        block_id = request.match_info["block_id"]
+        state["pages"].setdefault(block_id, []).extend(payload.get("children", []))
+        return web.json_response({"object": "list", "results": payload["children"]})
+
+    async def get_page(request: web.Request) -> web.Response:
+        children = state["pages"].get(request.match_info["page_id"])
+        if children is None:
+            return web.json_response({"object": "error"}, status=404)
+        return web.json_response(
+            {"id": request.match_info["page_id"], "children": children}
+        )
+
+    app = web.Application()
+    app.router.add_post("/v1/pages", create_page)
+    app.router.add_patch("/v1/blocks/{block_id}/children", append_children)
+    app.router.add_get("/_pages/{page_id}", get_page)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake of the Notion API")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument(
+        "--fail-first", type=int, default=0, help="first N requests answer 503"
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    web.run_app(create_app(args.fail_first, args.latency), port=args.port)
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import os
+import time
+
+import jwt
+from dotenv import load_dotenv
+from jwt.exceptions import InvalidTokenError
+
+load_dotenv()
+
+from app.redisconn import close_redis_pool, get_redis_pool
+from service.credential import token_key
+from service.usersession import SESSION_TTL, session_key
+
+LEGACY_TOKEN_HASH = "user"
+LEGACY_SESSION_HASH = "session"
+LEGACY_SESSION_PREFIX = "SessionToken"
+
+
+def remaining_ttl(token: str) -> int | None:
+    try:
+        payload = jwt.decode(token, os.environ["JWT_SECRET_KEY"], algorithms=["HS256"])
+    except InvalidTokenError:
+        return None
+    expires_at = payload.get("exp")
+    # exp가 없는 예전 토큰은 기본 세션 TTL을 적용
+    if expires_at is None:
+        return int(SESSION_TTL.total_seconds())
+    remaining = int(expires_at - time.time())
+    return remaining if remaining > 0 else None
+
+
+async def migrate_hash(redis, legacy_hash: str, to_key, batch_size: int) -> dict:
+    stats = {"migrated": 0, "existing": 0, "expired": 0}
+    cursor = 0
+    while True:
+        cursor, batch = await redis.hscan(legacy_hash, cursor, count=batch_size)
+        if batch:
+            async with redis.pipeline(transaction=False) as pipe:
+                for field, value in batch.items():
+                    target = to_key(field.decode())
+                    ttl = None if target is None else remaining_ttl(target[1])
+                    if ttl is None:
+                        stats["expired"] += 1
+                        continue
+                    if target[2] is not None:
+                        ttl = min(ttl, target[2])
+                    pipe.set(target[0], value, ex=ttl, nx=True)
+                pipe.hdel(legacy_hash, *batch.keys())
+                results = await pipe.execute()
+            # 마지막 결과는 hdel, 나머지는 SET NX (이미 키가 있으면 None)
+            for written in results[:-1]:
+                stats["migrated" if written else "existing"] += 1
+        if cursor == 0:
+            return stats
+
+
+# (새 키, JWT 토큰, 최대 TTL) 또는 이관 대상이 아니면 None
+LegacyTarget = tuple[str, str, int | None] | None
+
+
+def legacy_token_target(field: str) -> LegacyTarget:
+    return token_key(field), field, None
+
+
+def legacy_session_target(field: str) -> LegacyTarget:
+    if not field.startswith(LEGACY_SESSION_PREFIX):
+        return None
+    token = field[len(LEGACY_SESSION_PREFIX) :]
+    return session_key(token), token, int(SESSION_TTL.total_seconds())
+
+
+async def main(batch_size: int):
+    redis = get_redis_pool()
+    token_stats = await migrate_hash(
+        redis, LEGACY_TOKEN_HASH, legacy_token_target, batch_size
+    )
+    print(f"tokens: {token_stats}")
+    session_stats = await migrate_hash(
+        redis, LEGACY_SESSION_HASH, legacy_session_target, batch_size
+    )
+    print(f"sessions: {session_stats}")
+    await close_redis_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move legacy user/session hashes to per-token keys with TTLs"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import math
+import os
+import time
+import uuid
+from typing import Any
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.redisconn import get_redis_pool
+from utils.log import Logger
+from utils.looplag import loop_lag_monitor
+from utils.metrics import Counter, Gauge, Histogram
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+BRAINSTORM_USER_BURST = int(os.getenv("BRAINSTORM_USER_BURST", "3"))
+BRAINSTORM_USER_RATE_PER_MINUTE = float(
+    os.getenv("BRAINSTORM_USER_RATE_PER_MINUTE", "6")
+)
+BRAINSTORM_USER_CONCURRENCY = int(os.getenv("BRAINSTORM_USER_CONCURRENCY", "2"))
+BRAINSTORM_GLOBAL_CONCURRENCY = int(os.getenv("BRAINSTORM_GLOBAL_CONCURRENCY", "50"))
+BRAINSTORM_QUEUE_TIMEOUT = float(os.getenv("BRAINSTORM_QUEUE_TIMEOUT", "10"))
+# 워커가 죽어 반환되지 못한 슬롯은 이 시간이 지나면 자동으로 회수
+BRAINSTORM_SLOT_LEASE = int(os.getenv("BRAINSTORM_SLOT_LEASE", "600"))
+BRAINSTORM_SHED_LAG = float(os.getenv("BRAINSTORM_SHED_LAG", "0.5"))
+BRAINSTORM_RETRY_AFTER = 5
+
+# 버킷을 시간 경과만큼 채운 뒤 토큰 하나를 꺼냄
+# 부족하면 다음 토큰까지 남은 초를 돌려줌 (Lua 실수는 정수로 잘리므로 문자열로 반환)
+TAKE_TOKEN = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+# 거절된 요청이 가져간 토큰을 되돌려줌 (용량을 넘지 않게)
+REFUND_TOKEN = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tokens + 1))
+end
+return 1
+"""
+
+# 만료된 임대를 정리하고 남은 자리가 있으면 임대를 추가
+ACQUIRE_SLOT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[3])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+# 아직 임대 중인 슬롯이면 만료 시각을 늘림 (이미 회수됐으면 0)
+RENEW_SLOT = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[2]) then
+    return 0
+end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+redis.call('ZADD', KEYS[1], 'XX', now + tonumber(ARGV[1]), ARGV[2])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+return 1
+"""
+
+admission_requests = Counter(
+    "admission_requests_total", "Admission decisions by limiter and outcome"
+)
+admission_queued = Gauge("admission_queued", "Requests waiting for a global slot")
+admission_in_flight = Gauge(
+    "admission_in_flight", "Admitted requests still running on this worker"
+)
+admission_wait_seconds = Histogram(
+    "admission_wait_seconds", "Time spent queued for a global slot"
+)
+
+
+def too_many_requests(error: str, retry_after: float, status_code: int = 429):
+    return HTTPException(
+        status_code=status_code,
+        detail={"error": error, "message": "Too many brainstorm requests"},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class TokenBucket:
+    def __init__(self, prefix: str, capacity: int, rate_per_minute: float):
+        self.prefix = prefix
+        self.capacity = capacity
+        self.rate = rate_per_minute / 60
+
+    async def take(self, key: str) -> float:
+        wait = await get_redis_pool().eval(
+            TAKE_TOKEN, 1, self.prefix + key, self.capacity, self.rate
+        )
+        return float(wait)
+
+    async def refund(self, key: str) -> None:
+        await get_redis_pool().eval(REFUND_TOKEN, 1, self.prefix + key, self.capacity)
+
+
+class DistributedSemaphore:
+    def __init__(self, key: str, limit: int, lease: int = BRAINSTORM_SLOT_LEASE):
+        self.key = key
+        self.limit = limit
+        self.lease = lease
+
+    async def try_acquire(self, holder: str) -> bool:
+        acquired = await get_redis_pool().eval(
+            ACQUIRE_SLOT, 1, self.key, self.limit, self.lease, holder
+        )
+        return bool(acquired)
+
+    async def acquire(self, holder: str, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while not await self.try_acquire(holder):
+            if time.monotonic() + delay > deadline:
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        return True
+
+    async def renew(self, holder: str) -> bool:
+        renewed = await get_redis_pool().eval(
+            RENEW_SLOT, 1, self.key, self.lease, holder
+        )
+        return bool(renewed)
+
+    async def release(self, holder: str) -> None:
+        await get_redis_pool().zrem(self.key, holder)
+
+
+class Permit:
+    def __init__(self, slots: list[DistributedSemaphore], holder: str):
+        self.slots = slots
+        self.holder = holder
+        self._released = False
+        admission_in_flight.inc()
+        # 스트림이 임대 시간보다 길어져도 슬롯을 잃지 않도록 주기적으로 연장
+        self._renewal = asyncio.create_task(self._renew())
+
+    async def _renew(self) -> None:
+        interval = min(slot.lease for slot in self.slots) / 3
+        while True:
+            await asyncio.sleep(interval)
+            for slot in self.slots:
+                try:
+                    if not await slot.renew(self.holder):
+                        logger.warning(f"Admission slot {slot.key} lease was lost")
+                except Exception as e:
+                    logger.warning(f"Failed to renew admission slot {slot.key}: {e}")
+
+    async def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._renewal.cancel()
+        admission_in_flight.dec()
+        for slot in self.slots:
+            try:
+                await slot.release(self.holder)
+            except Exception as e:
+                logger.warning(f"Failed to release admission slot {slot.key}: {e}")
+
+
+class PermitStreamingResponse(StreamingResponse):
+    # 본문 전송이 시작되지 않고 끝나도(클라이언트가 먼저 끊는 등) 슬롯을 반환
+    def __init__(self, content: Any, permit: Permit, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self.permit = permit
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.permit.release()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        name: str,
+        user_bucket: TokenBucket,
+        user_concurrency: int,
+        global_slots: DistributedSemaphore,
+        queue_timeout: float,
+        shed_lag: float,
+    ):
+        self.name = name
+        self.user_bucket = user_bucket
+        self.user_concurrency = user_concurrency
+        self.global_slots = global_slots
+        self.queue_timeout = queue_timeout
+        self.shed_lag = shed_lag
+        self._queued = 0
+        admission_queued.set_function(lambda: self._queued, limiter=name)
+
+    def user_slots(self, user_id: str) -> DistributedSemaphore:
+        return DistributedSemaphore(
+            f"admission:{self.name}:user:{user_id}",
+            self.user_concurrency,
+            self.global_slots.lease,
+        )
+
+    async def admit(self, user_id: str) -> Permit:
+        if loop_lag_monitor.lag > self.shed_lag:
+            admission_requests.inc(limiter=self.name, outcome="shed")
+            raise too_many_requests("OVERLOADED", BRAINSTORM_RETRY_AFTER, 503)
+
+        holder = uuid.uuid4().hex
+        user_slots = self.user_slots(user_id)
+        try:
+            wait = await self.user_bucket.take(user_id)
+            if wait > 0:
+                admission_requests.inc(limiter=self.name, outcome="rate_limited")
+                raise too_many_requests("RATE_LIMITED", wait)
+            # 아래에서 거절되면 실행되지 않은 요청이므로 토큰을 되돌려줌
+            if not await user_slots.try_acquire(holder):
+                await self.user_bucket.refund(user_id)
+                admission_requests.inc(limiter=self.name, outcome="user_concurrency")
+                raise too_many_requests("TOO_MANY_RUNS", BRAINSTORM_RETRY_AFTER)
+
+            started = time.monotonic()
+            self._queued += 1
+            try:
+                acquired = await self.global_slots.acquire(holder, self.queue_timeout)
+            finally:
+                self._queued -= 1
+            admission_wait_seconds.observe(
+                time.monotonic() - started, limiter=self.name
+            )
+            if not acquired:
+                await user_slots.release(holder)
+                await self.user_bucket.refund(user_id)
+                admission_requests.inc(limiter=self.name, outcome="queue_timeout")
+                raise too_many_requests("QUEUE_TIMEOUT", BRAINSTORM_RETRY_AFTER)
+        except HTTPException:
+            raise
+        except Exception as e:
+            # 리미터 장애로 기능 전체를 막지 않도록 통과시킴
+            logger.warning(f"Admission check for {self.name} failed, admitting: {e}")
+            admission_requests.inc(limiter=self.name, outcome="bypassed")
+            return Permit([user_slots, self.global_slots], holder)
+
+        admission_requests.inc(limiter=self.name, outcome="admitted")
+        return Permit([user_slots, self.global_slots], holder)
+
+
+brainstorm_admission = AdmissionController(
+    name="brainstorm",
+    user_bucket=TokenBucket(
+        "admission:brainstorm:bucket:",
+        BRAINSTORM_USER_BURST,
+        BRAINSTORM_USER_RATE_PER_MINUTE,
+    ),
+    user_concurrency=BRAINSTORM_USER_CONCURRENCY,
+    global_slots=DistributedSemaphore(
+        "admission:brainstorm:slots", BRAINSTORM_GLOBAL_CONCURRENCY
+    ),
+    queue_timeout=BRAINSTORM_QUEUE_TIMEOUT,
+    shed_lag=BRAINSTORM_SHED_LAG,
+)
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import logging
+import os
+import unicodedata
+from typing import Awaitable, Callable
+
+from app.redisconn import get_redis_pool
+from utils import codec
+from utils.cache import TTLCache
+from utils.log import Logger
+from utils.metrics import Counter
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", str(60 * 60 * 24)))
+ANSWER_CACHE_LOCAL_TTL = float(os.getenv("ANSWER_CACHE_LOCAL_TTL", "300"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_WARM_INTERVAL = int(
+    os.getenv("ANSWER_CACHE_WARM_INTERVAL", str(60 * 60 * 6))
+)
+ANSWER_WARM_LOCK_TTL = 600
+
+answer_cache_requests = Counter(
+    "answer_cache_requests_total", "Brainstorm answer cache lookups by tier"
+)
+answer_cache_warms = Counter(
+    "answer_cache_warms_total", "Brainstorm answers precomputed by outcome"
+)
+
+AnswerGenerator = Callable[[str], Awaitable[str]]
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", prompt).casefold().split())
+
+
+def answer_key(prompt: str, assistant_id: str) -> str:
+    digest = hashlib.sha1(normalize_prompt(prompt).encode()).hexdigest()
+    return f"answer:{assistant_id}:{digest}"
+
+
+class AnswerCache:
+    def __init__(self, maxsize: int, local_ttl: float, ttl: int):
+        self.local = TTLCache(maxsize=maxsize, ttl=local_ttl)
+        self.ttl = ttl
+        self._task: asyncio.Task | None = None
+
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    async def get(self, prompt: str, assistant_id: str) -> str | None:
+        key = answer_key(prompt, assistant_id)
+        answer = self.local.get(key)
+        if answer is not None:
+            answer_cache_requests.inc(tier="local")
+            return answer
+        try:
+            cached = await self.redis_connection.get(key)
+        except Exception as e:
+            logger.warning(f"Answer cache read failed: {e}")
+            cached = None
+        if cached is None:
+            answer_cache_requests.inc(tier="miss")
+            return None
+        answer_cache_requests.inc(tier="redis")
+        answer = codec.decode(cached)
+        self.local.set(key, answer)
+        return answer
+
+    async def put(self, prompt: str, assistant_id: str, answer: str) -> None:
+        key = answer_key(prompt, assistant_id)
+        self.local.set(key, answer)
+        try:
+            await self.redis_connection.set(key, codec.encode(answer), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Answer cache write failed: {e}")
+
+    async def warm(
+        self, prompts: list[str], assistant_id: str, generate: AnswerGenerator
+    ) -> int:
+        warmed = 0
+        for prompt in prompts:
+            key = answer_key(prompt, assistant_id)
+            if await self.redis_connection.exists(key):
+                continue
+            # 같은 프롬프트를 여러 워커가 동시에 생성하지 않도록 잠금
+            claimed = await self.redis_connection.set(
+                f"{key}:warming", "1", nx=True, ex=ANSWER_WARM_LOCK_TTL
+            )
+            if not claimed:
+                continue
+            try:
+                answer = await generate(prompt)
+            except Exception as e:
+                answer_cache_warms.inc(outcome="failed")
+                logger.warning(f"Failed to precompute answer for {prompt!r}: {e}")
+                continue
+            await self.put(prompt, assistant_id, answer)
+            answer_cache_warms.inc(outcome="done")
+            warmed += 1
+        return warmed
+
+    async def start(
+        self,
+        prompts: list[str],
+        assistant_id: str | None,
+        generate: AnswerGenerator,
+        interval: int = ANSWER_CACHE_WARM_INTERVAL,
+    ) -> None:
+        if self._task is not None or not assistant_id:
+            return
+        self._task = asyncio.create_task(
+            self._run(prompts, assistant_id, generate, interval)
+        )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(
+        self,
+        prompts: list[str],
+        assistant_id: str,
+        generate: AnswerGenerator,
+        interval: int,
+    ) -> None:
+        while True:
+            try:
+                warmed = await self.warm(prompts, assistant_id, generate)
+                if warmed:
+                    logger.info(f"Precomputed {warmed} brainstorm answers")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Answer cache warm-up failed: {e}")
+            await asyncio.sleep(interval)
+
+
+answer_cache = AnswerCache(
+    maxsize=ANSWER_CACHE_SIZE, local_ttl=ANSWER_CACHE_LOCAL_TTL, ttl=ANSWER_CACHE_TTL
+)
@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+from fastapi import HTTPException
+
+from service.google_search import google_search
+from service.jobqueue import JobQueue
+from service.notion_log import notionlog
+from utils.jsonstream import parse_json_object
+from utils.log import Logger
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GOOGLE_SEARCH_ENGINE_ID = os.getenv("GOOGLE_SEARCH_ENGINE_ID")
+
+MAX_SEARCH_KEYWORDS = 5
+MAX_IMAGE_URLS = 10
+MAX_SEARCH_URLS = 20
+NOTION_JOB_CONCURRENCY = int(os.getenv("NOTION_JOB_CONCURRENCY", "2"))
+
+# /flows/recommend에서 내려주는 프롬프트, 답변 캐시를 미리 채울 때도 사용
+RECOMMENDED_PROMPTS = [
+    "자율주행 자동차 프로젝트",
+    "파이썬으로 머신러닝 공부하기",
+    "환경 보호화 관련된 웹사이트",
+]
+
+
+async def search_google_url(query: str, num_results: int = 1) -> list[str]:
+    try:
+        return await google_search.search_links(
+            GOOGLE_API_KEY, GOOGLE_SEARCH_ENGINE_ID, query, num_results
+        )
+    except Exception as e:
+        logger.warning(f"Failed to fetch urls for {query!r}: {e}")
+        return []
+
+
+async def search_google_images(query: str, num_results: int = 3) -> list[str]:
+    try:
+        return await google_search.search_links(
+            GOOGLE_API_KEY,
+            GOOGLE_SEARCH_ENGINE_ID,
+            query,
+            num_results,
+            search_type="image",
+        )
+    except Exception as e:
+        logger.warning(f"Failed to fetch images for {query!r}: {e}")
+        return []
+
+
+async def publish_notion_job(payload: dict) -> dict:
+    logger.info("노션에 기록중...")
+    return await notionlog(
+        payload["main_title"],
+        payload["markdown"],
+        payload["image_urls"],
+        payload["search_urls"],
+        payload.setdefault("progress", {}),
+    )
+
+
+notion_queue = JobQueue(
+    "notion", publish_notion_job, concurrency=NOTION_JOB_CONCURRENCY
+)
+
+
+def search_keywords(value) -> list[str]:
+    # 모델이 리스트 대신 문자열 하나를 돌려주는 경우도 있음 (그 외 타입은 무시)
+    if isinstance(value, str):
+        keywords = [value]
+    elif isinstance(value, list):
+        keywords = value
+    else:
+        return []
+    keywords = [keyword for keyword in keywords if isinstance(keyword, str) and keyword]
+    return keywords[:MAX_SEARCH_KEYWORDS]
+
+
+def parse_answer(answer: str) -> dict:
+    return parse_json_object(answer)
+
+
+class BrainstormPipeline:
+    def __init__(self):
+        self.image_urls: list[str] = []
+        self.search_urls: list[str] = []
+        self._prefetched: dict[tuple[str, str], asyncio.Task] = {}
+
+    @staticmethod
+    def _extend(target: list[str], urls: list[str], limit: int) -> list[str]:
+        added = []
+        for url in urls:
+            if len(target) >= limit:
+                break
+            if url and url not in target:
+                target.append(url)
+                added.append(url)
+        return added
+
+    def add_image_urls(self, urls: list[str]) -> list[str]:
+        return self._extend(self.image_urls, urls, MAX_IMAGE_URLS)
+
+    def add_search_urls(self, urls: list[str]) -> list[str]:
+        return self._extend(self.search_urls, urls, MAX_SEARCH_URLS)
+
+    def on_field(self, name: str, value) -> None:
+        # 답변 생성이 끝나기 전에 먼저 닫힌 검색 키워드로 검색을 시작해 둠
+        if name == "image_keyword" and value:
+            self._prefetch("image", value, search_google_images)
+        elif name == "search_keyword":
+            for keyword in search_keywords(value):
+                self._prefetch("url", keyword, search_google_url)
+
+    def _prefetch(self, kind: str, query: str, search) -> None:
+        if (kind, query) not in self._prefetched:
+            self._prefetched[(kind, query)] = asyncio.ensure_future(search(query))
+
+    def _lookup(self, kind: str, query: str, search):
+        prefetched = self._prefetched.pop((kind, query), None)
+        return prefetched if prefetched is not None else search(query)
+
+    async def search(self, json_answer: dict) -> dict:
+        # 이미지 링크와 참조 링크를 동시에 검색
+        image_keyword = json_answer.get("image_keyword")
+        keywords = search_keywords(json_answer.get("search_keyword"))
+        self.add_search_urls(json_answer.get("search_urls") or [])
+        lookups = [
+            self._lookup("url", keyword, search_google_url) for keyword in keywords
+        ]
+        if image_keyword:
+            lookups.append(self._lookup("image", image_keyword, search_google_images))
+        results = await asyncio.gather(*lookups)
+
+        for search_urls in results[: len(keywords)]:
+            self.add_search_urls(search_urls)
+        if image_keyword:
+            self.add_image_urls(results[-1])
+            json_answer["image_urls"] = list(self.image_urls)
+        if keywords:
+            json_answer["search_urls"] = list(self.search_urls)
+        return json_answer
+
+    def summarize(self, json_answer: dict) -> dict:
+        if json_answer.get("summary"):
+            context = json_answer.get("summary")
+            context += "\n\n Reference Links:"
+            for url in self.search_urls:
+                context += f"\n{url}"
+
+            context += "\n\n Image Links:"
+            for url in self.image_urls:
+                context += f"\n{url}"
+
+            json_answer["summary"] = context
+        return json_answer
+
+    async def publish_notion(self, json_answer: dict) -> str:
+        payload = {
+            "main_title": json_answer.get("main_title"),
+            "markdown": json_answer.get("markdown"),
+            "image_urls": self.image_urls,
+            "search_urls": self.search_urls,
+        }
+        dedupe_key = hashlib.sha1(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()
+        ).hexdigest()
+        return await notion_queue.enqueue(payload, dedupe_key=dedupe_key)
+
+    async def run(self, answer: str):
+        try:
+            json_answer = parse_answer(answer)
+            json_answer = self.summarize(await self.search(json_answer))
+        except json.JSONDecodeError:
+            raise HTTPException(
+                status_code=400, detail="Failed to decode JSON response."
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"An error occurred during JSON conversion: {str(e)}",
+            )
+        if json_answer.get("status") == "markdown":
+            json_answer["notion_job_id"] = await self.publish_notion(json_answer)
+        return json_answer
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable
+
+from app.redisconn import get_redis_pool
+from utils.log import Logger
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+Handler = Callable[[dict], Awaitable[None] | None]
+
+
+class CacheBus:
+    def __init__(self):
+        self.handlers: dict[str, list[Handler]] = {}
+        self._task: asyncio.Task | None = None
+        self._pubsub = None
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        self.handlers.setdefault(channel, []).append(handler)
+
+    async def publish(self, channel: str, message: dict) -> None:
+        await get_redis_pool().publish(channel, json.dumps(message))
+
+    async def start(self) -> None:
+        if self._task is not None or not self.handlers:
+            return
+        self._pubsub = get_redis_pool().pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(*self.handlers.keys())
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._pubsub.aclose()
+        self._pubsub = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache bus receive error: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                payload = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+            for handler in self.handlers.get(channel, []):
+                try:
+                    result = handler(payload)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    logger.warning(f"Cache bus handler error on {channel}: {e}")
+
+
+cache_bus = CacheBus()
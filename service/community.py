@@ -0,0 +1,207 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from bson import Binary
+from pymongo import DESCENDING, UpdateOne
+
+from app.redisconn import get_redis_pool
+from entity.community import CommunityFlow
+from service.liveblock import liveblock
+from utils.log import Logger
+from utils.metrics import Counter, Gauge
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+COMMUNITY_GROUP = "community"
+COMMUNITY_RECONCILE_INTERVAL = int(os.getenv("COMMUNITY_RECONCILE_INTERVAL", "300"))
+COMMUNITY_RECONCILE_LOCK_KEY = "community:reconcile:lock"
+
+CommunitySort = Literal["recent", "viewers"]
+SORT_FIELDS = {"recent": "published_at", "viewers": "viewers"}
+
+community_reconciles = Counter(
+    "community_reconciles_total", "Community index reconciliation runs by outcome"
+)
+community_index_size = Gauge(
+    "community_index_flows", "Flows in the community index after the last reconcile"
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(flow: CommunityFlow, sort: CommunitySort) -> str:
+    value = getattr(flow, SORT_FIELDS[sort])
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, str(flow.id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: CommunitySort) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, flow_id = json.loads(raw)
+        if sort == "recent":
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, int):
+            raise ValueError(value)
+        return value, UUID(flow_id)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def room_fields(room: dict) -> dict:
+    metadata = room.get("metadata") or {}
+    # Liveblocks 메타데이터 값은 문자열로 저장됨
+    try:
+        viewers = int(metadata.get("viewers") or 0)
+    except (TypeError, ValueError):
+        viewers = 0
+    return {
+        "start_message": metadata.get("start_message") or "",
+        "author_id": metadata.get("owner_id"),
+        "author_name": metadata.get("owner_name"),
+        "author_profile_url": metadata.get("owner_profile_url"),
+        "viewers": viewers,
+    }
+
+
+def room_uuid(room: dict) -> UUID | None:
+    try:
+        return UUID(room["id"])
+    except (KeyError, ValueError):
+        return None
+
+
+def upsert_operation(flow_id: UUID, room: dict, now: datetime) -> UpdateOne:
+    return UpdateOne(
+        {"_id": Binary.from_uuid(flow_id)},
+        {
+            "$set": {**room_fields(room), "indexed_at": now},
+            "$setOnInsert": {"published_at": now},
+        },
+        upsert=True,
+    )
+
+
+class CommunityIndex:
+    def __init__(self, interval: int = COMMUNITY_RECONCILE_INTERVAL):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    async def publish(self, room: dict) -> None:
+        flow_id = room_uuid(room)
+        if flow_id is not None:
+            await CommunityFlow.get_motor_collection().bulk_write(
+                [upsert_operation(flow_id, room, datetime.utcnow())]
+            )
+
+    async def search(
+        self,
+        limit: int,
+        sort: CommunitySort = "recent",
+        query: str | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[CommunityFlow], str | None]:
+        field = SORT_FIELDS[sort]
+        filters = {}
+        if query:
+            filters["$text"] = {"$search": query}
+        if cursor:
+            value, flow_id = decode_cursor(cursor, sort)
+            filters["$or"] = [
+                {field: {"$lt": value}},
+                {field: value, "_id": {"$lt": Binary.from_uuid(flow_id)}},
+            ]
+        flows = (
+            await CommunityFlow.find(filters)
+            .sort([(field, DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+            .to_list()
+        )
+        next_cursor = None
+        if len(flows) > limit:
+            flows = flows[:limit]
+            next_cursor = encode_cursor(flows[-1], sort)
+        return flows, next_cursor
+
+    async def reconcile(self) -> int:
+        # 목록을 읽는 동안 publish()로 들어온 항목은 지우지 않도록 시작 시각을 기록
+        started = datetime.utcnow()
+        rooms = {}
+        # 페이지 조회가 중간에 실패하면 예외로 빠져나가 아래 삭제는 실행되지 않음
+        async for room in liveblock.iter_rooms(groupIds=COMMUNITY_GROUP):
+            flow_id = room_uuid(room)
+            if flow_id and COMMUNITY_GROUP in (room.get("groupsAccesses") or {}):
+                rooms[flow_id] = room
+
+        if not rooms:
+            # 빈 목록은 장애일 수 있으므로 색인 전체를 지우지 않음
+            logger.warning("Community room listing was empty, skipping reconcile")
+            return 0
+
+        now = datetime.utcnow()
+        operations = [
+            upsert_operation(flow_id, room, now) for flow_id, room in rooms.items()
+        ]
+        collection = CommunityFlow.get_motor_collection()
+        await collection.bulk_write(operations, ordered=False)
+        # 공개가 해제되었거나 삭제된 방은 색인에서 제거
+        await collection.delete_many(
+            {
+                "_id": {"$nin": [Binary.from_uuid(flow_id) for flow_id in rooms]},
+                "$or": [
+                    {"indexed_at": {"$lt": started}},
+                    {
+                        "indexed_at": {"$exists": False},
+                        "published_at": {"$lt": started},
+                    },
+                ],
+            }
+        )
+        community_index_size.set(len(rooms))
+        return len(rooms)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # 여러 워커 중 한 곳만 주기마다 동기화
+                claimed = await self.redis_connection.set(
+                    COMMUNITY_RECONCILE_LOCK_KEY, "1", nx=True, ex=self.interval
+                )
+                if claimed:
+                    count = await self.reconcile()
+                    community_reconciles.inc(outcome="done")
+                    logger.info(f"Reconciled community index ({count} flows)")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                community_reconciles.inc(outcome="failed")
+                logger.warning(f"Community index reconcile failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+community_index = CommunityIndex()
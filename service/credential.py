@@ -1,5 +1,7 @@
 import os
+import time
 import jwt
+from uuid import UUID
 
 from passlib.context import CryptContext
 from jwt.exceptions import InvalidTokenError
@@ -9,25 +11,28 @@ from fastapi import HTTPException, status, Security, Depends, WebSocket
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.testmode import get_or_create_test_user, TEST_USER_ACCESS_TOKEN
-from app.redisconn import RedisConn
-from entity.user import User as ODMUser
+from app.redisconn import get_redis_pool
+from entity.user import User as ODMUser, UserProfile
+from service.usercache import user_cache
+from service.usersession import session_key
+from utils import codec
 
 security = HTTPBearer(
     scheme_name="access_token",
     description="/auth에서 발급받은 토큰을 입력해주세요",
 )
 
+TOKEN_KEY_PREFIX = "token:"
 
-def get_redis_pool():
-    redis_pool = RedisConn(
-        host=os.environ["REDIS_HOST"], port=int(os.environ["REDIS_PORT"]), db=0
-    )
-    return redis_pool.connection
+
+def token_key(token: str) -> str:
+    return TOKEN_KEY_PREFIX + token
 
 
 class Credential:
-    def __init__(self):
-        self.redis_connection = get_redis_pool()
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
 
     @staticmethod
     def verify_password(
@@ -49,15 +54,25 @@ class Credential:
         )
         return encoded_token
 
-    async def register_token(self, expire: timedelta, user_id: str, token: str):
-        await self.redis_connection.hset("user", token, user_id)
-        await self.redis_connection.expire(token, expire)
+    async def register_token(
+        self,
+        expire: timedelta,
+        user_id: str,
+        token: str,
+        session_data: dict | None = None,
+    ):
+        async with self.redis_connection.pipeline(transaction=True) as pipe:
+            pipe.set(token_key(token), user_id, ex=expire)
+            if session_data is not None:
+                pipe.set(session_key(token), codec.encode(session_data), ex=expire)
+            await pipe.execute()
 
     async def delete_token(self, token: str):
-        await self.redis_connection.hdel("user", token)
+        await self.redis_connection.delete(token_key(token), session_key(token))
+        await user_cache.invalidate_token(token)
 
     async def is_valid_token(self, token: str):
-        return await self.redis_connection.hexists("user", token)
+        return bool(await self.redis_connection.exists(token_key(token)))
 
 
 set_credential_manager = Credential()
@@ -67,32 +82,51 @@ async def depends_credential():
     return set_credential_manager
 
 
-async def get_current_user_ws(
-    session_token: str,
-    websocket: WebSocket,
-    credential: Credential = set_credential_manager,
-) -> ODMUser | None:
+async def resolve_user(
+    credential: Credential, session_token: str
+) -> ODMUser | UserProfile | None:
+    cached_user = user_cache.get(session_token)
+    if cached_user is not None:
+        return cached_user
     if os.getenv("TEST_MODE") == "true":
         if session_token == TEST_USER_ACCESS_TOKEN:
-            return await get_or_create_test_user()
+            odm_user = await get_or_create_test_user()
+            user_cache.put(session_token, odm_user)
+            return odm_user
     try:
         payload = jwt.decode(
             session_token, os.environ["JWT_SECRET_KEY"], algorithms=["HS256"]
         )
-        user_document_id: str | None = payload.get("sub")
-        if user_document_id is None:
-            return await websocket.send_json(
-                {"op": -3, "msg": "Could not validate credentials"}
-            )
     except InvalidTokenError:
-        return await websocket.send_json(
-            {"op": -3, "msg": "Could not validate credentials"}
-        )
+        return None
+    user_document_id: str | None = payload.get("sub")
+    if user_document_id is None:
+        return None
     if not await credential.is_valid_token(token=session_token):
-        return await websocket.send_json(
-            {"op": -3, "msg": "Could not validate credentials"}
-        )
-    odm_user = await ODMUser.get(document_id=user_document_id)
+        return None
+    try:
+        user_id = UUID(user_document_id)
+    except ValueError:
+        return None
+    odm_user = await ODMUser.find_one(
+        ODMUser.id == user_id, projection_model=UserProfile
+    )
+    if odm_user is None:
+        return None
+    # 캐시된 사용자가 토큰 만료 시각을 넘겨 살아남지 않도록 TTL을 제한
+    # exp가 없는 토큰은 캐시 기본 TTL을 사용
+    expires_at = payload.get("exp")
+    ttl = None if expires_at is None else max(0.0, expires_at - time.time())
+    user_cache.put(session_token, odm_user, ttl=ttl)
+    return odm_user
+
+
+async def get_current_user_ws(
+    session_token: str,
+    websocket: WebSocket,
+    credential: Credential = set_credential_manager,
+) -> ODMUser | UserProfile | None:
+    odm_user = await resolve_user(credential, session_token)
     if odm_user is None:
         return await websocket.send_json(
             {"op": -3, "msg": "Could not validate credentials"}
@@ -103,28 +137,12 @@ async def get_current_user_ws(
 async def get_current_user(
     credential: Credential = Depends(depends_credential),
     authorization: HTTPAuthorizationCredentials = Security(security),
-) -> ODMUser:
-    session_token = authorization.credentials
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    if os.getenv("TEST_MODE") == "true":
-        if session_token == TEST_USER_ACCESS_TOKEN:
-            return await get_or_create_test_user()
-    try:
-        payload = jwt.decode(
-            session_token, os.environ["JWT_SECRET_KEY"], algorithms=["HS256"]
-        )
-        user_document_id: str | None = payload.get("sub")
-        if user_document_id is None:
-            raise credentials_exception
-    except InvalidTokenError:
-        raise credentials_exception
-    if not await credential.is_valid_token(token=session_token):
-        raise credentials_exception
-    odm_user = await ODMUser.get(document_id=user_document_id)
+) -> ODMUser | UserProfile:
+    odm_user = await resolve_user(credential, authorization.credentials)
     if odm_user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return odm_user
@@ -0,0 +1,340 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from bson import Binary
+from pydantic import ValidationError
+from pymongo import UpdateOne
+
+from app.redisconn import get_redis_pool
+from entity.flow import Edge, Flow as ODMFlow, FlowVersion, Node
+from service.liveblock import liveblock
+from utils.cache import TTLCache
+from utils.log import Logger
+from utils.metrics import Counter, Gauge
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+FLOW_SNAPSHOT_INTERVAL = float(os.getenv("FLOW_SNAPSHOT_INTERVAL", "5"))
+FLOW_SNAPSHOT_BATCH = int(os.getenv("FLOW_SNAPSHOT_BATCH", "100"))
+# 마지막 접속 이후 이 시간 동안은 편집 중인 flow로 보고 주기적으로 스냅샷을 뜸
+FLOW_SNAPSHOT_ACTIVE_WINDOW = int(os.getenv("FLOW_SNAPSHOT_ACTIVE_WINDOW", "600"))
+FLOW_SNAPSHOT_FETCH_CONCURRENCY = 8
+# 편집 중에는 최소 이 간격마다 이전 내용을 flow_versions에 남김
+FLOW_VERSION_INTERVAL = float(os.getenv("FLOW_VERSION_INTERVAL", "300"))
+ACTIVE_FLOWS_KEY = "flows:active"
+SNAPSHOT_LOCK_KEY = "flows:snapshot:lock"
+# Liveblocks와 마지막으로 맞춰본 뒤 active_window가 지나면 키가 사라짐
+SYNCED_KEY_PREFIX = "flows:synced:"
+
+flow_snapshot_writes = Counter(
+    "flow_snapshot_writes_total", "Flow snapshots handled by the batch writer"
+)
+flow_snapshot_pending = Gauge(
+    "flow_snapshot_pending", "Flow snapshots waiting to be written to MongoDB"
+)
+
+StorageLoader = Callable[[str], Awaitable[dict]]
+RoomLoader = Callable[[str], Awaitable[dict]]
+
+
+def digest(value) -> str:
+    body = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(body.encode()).hexdigest()
+
+
+def snapshot_checksum(nodes: list[dict], edges: list[dict]) -> str:
+    return digest([nodes, edges])
+
+
+def room_fields(room: dict) -> dict:
+    metadata = room.get("metadata") or {}
+    return {
+        "owner_id": metadata.get("owner_id"),
+        "name": metadata.get("start_message"),
+        "users_accesses": room.get("usersAccesses") or {},
+        "community": "community" in (room.get("groupsAccesses") or {}),
+    }
+
+
+def validate_elements(
+    flow_id: str, model: type[Node] | type[Edge], elements: list[dict]
+) -> list[dict]:
+    # 잘못된 요소 하나 때문에 스냅샷 전체를 버리지 않도록 요소 단위로 걸러냄
+    valid = []
+    for element in elements:
+        try:
+            valid.append(model.model_validate(element).model_dump())
+        except ValidationError as e:
+            logger.warning(
+                f"Skipping invalid {model.__name__.lower()} in flow {flow_id}: {e}"
+            )
+            flow_snapshot_writes.inc(outcome="invalid_element")
+    return valid
+
+
+class FlowSnapshotWriter:
+    def __init__(
+        self,
+        loader: StorageLoader,
+        room_loader: RoomLoader,
+        interval: float = FLOW_SNAPSHOT_INTERVAL,
+        batch_size: int = FLOW_SNAPSHOT_BATCH,
+        active_window: int = FLOW_SNAPSHOT_ACTIVE_WINDOW,
+    ):
+        self.loader = loader
+        self.room_loader = room_loader
+        self.interval = interval
+        self.batch_size = batch_size
+        self.active_window = active_window
+        self._pending: dict[str, dict] = {}
+        # 내용이 바뀌지 않은 스냅샷은 다시 쓰지 않음
+        self._checksums = TTLCache(maxsize=10_000, ttl=active_window)
+        # flow별 마지막으로 기록한 버전의 (checksum, 기록 시각)
+        self._versions = TTLCache(maxsize=10_000, ttl=active_window)
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        flow_snapshot_pending.set_function(lambda: len(self._pending))
+
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    def put(
+        self, flow_id: str, nodes: list[dict], edges: list[dict], **fields
+    ) -> None:
+        nodes = validate_elements(flow_id, Node, nodes)
+        edges = validate_elements(flow_id, Edge, edges)
+        snapshot = self._pending.get(flow_id, {})
+        snapshot.update(
+            {key: value for key, value in fields.items() if value is not None},
+            nodes=nodes,
+            edges=edges,
+        )
+        self._pending[flow_id] = snapshot
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def touch(self, flow_id: str) -> None:
+        try:
+            await self.redis_connection.zadd(ACTIVE_FLOWS_KEY, {flow_id: time.time()})
+        except Exception as e:
+            logger.warning(f"Failed to mark flow {flow_id} active: {e}")
+
+    async def _mark_synced(self, flow_ids: list[str]) -> None:
+        if not flow_ids:
+            return
+        try:
+            async with self.redis_connection.pipeline(transaction=False) as pipe:
+                for flow_id in flow_ids:
+                    pipe.set(SYNCED_KEY_PREFIX + flow_id, 1, ex=self.active_window)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to mark flow snapshots synced: {e}")
+
+    async def _is_synced(self, flow_id: str) -> bool:
+        try:
+            return bool(await self.redis_connection.exists(SYNCED_KEY_PREFIX + flow_id))
+        except Exception as e:
+            logger.warning(f"Failed to check snapshot freshness of {flow_id}: {e}")
+            return True
+
+    async def invalidate(self, flow_id: str) -> None:
+        # 접근 권한이 바뀌면 다음 조회 때 Liveblocks에서 다시 읽도록 함
+        try:
+            await self.redis_connection.delete(SYNCED_KEY_PREFIX + flow_id)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate snapshot of flow {flow_id}: {e}")
+
+    async def _fetch(self, flow_id: str) -> tuple[dict, dict]:
+        return await asyncio.gather(self.loader(flow_id), self.room_loader(flow_id))
+
+    async def load(self, flow_id: str) -> ODMFlow | None:
+        try:
+            uuid = UUID(flow_id)
+        except ValueError:
+            return None
+        flow = await ODMFlow.get(uuid)
+        if flow is not None and self._pending.get(flow_id):
+            # 아직 쓰이지 않은 최신 스냅샷이 있으면 덮어서 돌려줌
+            flow = self._merge(uuid, flow)
+        # 접근 정보가 없는 예전 스냅샷은 권한 확인을 위해 다시 읽어옴
+        if flow is not None and flow.users_accesses and await self._is_synced(flow_id):
+            return flow
+        # 스냅샷이 없거나 접속이 끊긴 뒤 편집되었을 수 있으면 Liveblocks에서 다시 읽어옴
+        try:
+            storage, room = await self._fetch(flow_id)
+        except Exception as e:
+            logger.warning(f"Failed to refresh storage of flow {flow_id}: {e}")
+            return flow
+        if room.get("error") == "ROOM_NOT_FOUND":
+            return None
+        if "error" in storage or "error" in room:
+            return flow
+        self.put(
+            flow_id,
+            storage.get("nodes", []),
+            storage.get("edges", []),
+            **room_fields(room),
+        )
+        await self._mark_synced([flow_id])
+        return self._merge(uuid, flow)
+
+    def _merge(self, uuid: UUID, flow: ODMFlow | None) -> ODMFlow:
+        stored = {} if flow is None else flow.model_dump(exclude={"id"})
+        return ODMFlow(id=uuid, **{**stored, **self._pending.get(str(uuid), {})})
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._collect_active()
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Flow snapshot cycle failed: {e}")
+
+    async def _collect_active(self) -> None:
+        # 여러 워커 중 한 곳만 주기마다 Liveblocks storage를 읽어옴
+        claimed = await self.redis_connection.set(
+            SNAPSHOT_LOCK_KEY, "1", nx=True, ex=max(int(self.interval), 1)
+        )
+        if not claimed:
+            return
+        now = time.time()
+        await self.redis_connection.zremrangebyscore(
+            ACTIVE_FLOWS_KEY, "-inf", now - self.active_window
+        )
+        flow_ids = [
+            flow_id.decode()
+            for flow_id in await self.redis_connection.zrange(ACTIVE_FLOWS_KEY, 0, -1)
+        ]
+        semaphore = asyncio.Semaphore(FLOW_SNAPSHOT_FETCH_CONCURRENCY)
+
+        synced = []
+
+        async def fetch(flow_id: str) -> None:
+            async with semaphore:
+                try:
+                    storage, room = await self._fetch(flow_id)
+                except Exception as e:
+                    logger.warning(f"Failed to fetch storage of flow {flow_id}: {e}")
+                    return
+            if "error" in storage or "error" in room:
+                return
+            self.put(
+                flow_id,
+                storage.get("nodes", []),
+                storage.get("edges", []),
+                **room_fields(room),
+            )
+            synced.append(flow_id)
+
+        await asyncio.gather(*(fetch(flow_id) for flow_id in flow_ids))
+        await self._mark_synced(synced)
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        operations = []
+        checksums = {}
+        now = datetime.utcnow()
+        for flow_id, snapshot in batch.items():
+            # 내용과 접근 정보가 모두 그대로면 다시 쓰지 않음
+            checksum = digest(snapshot)
+            if self._checksums.get(flow_id) == checksum:
+                flow_snapshot_writes.inc(outcome="unchanged")
+                continue
+            checksums[flow_id] = checksum
+            operations.append(
+                UpdateOne(
+                    {"_id": Binary.from_uuid(UUID(flow_id))},
+                    {
+                        "$set": {**snapshot, "updated_at": now},
+                        "$inc": {"version": 1},
+                    },
+                    upsert=True,
+                )
+            )
+        if not operations:
+            return 0
+        try:
+            await ODMFlow.get_motor_collection().bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.warning(f"Flow snapshot write failed, retrying later: {e}")
+            # 그사이 들어온 더 최신 스냅샷은 덮어쓰지 않음
+            for flow_id, snapshot in batch.items():
+                self._pending[flow_id] = {**snapshot, **self._pending.get(flow_id, {})}
+            flow_snapshot_writes.inc(len(operations), outcome="failed")
+            return 0
+        for flow_id, checksum in checksums.items():
+            self._checksums.set(flow_id, checksum)
+        flow_snapshot_writes.inc(len(operations), outcome="written")
+        await self._record_versions(
+            {flow_id: batch[flow_id] for flow_id in checksums}, now
+        )
+        return len(operations)
+
+    async def _record_versions(self, snapshots: dict[str, dict], now: datetime) -> None:
+        documents = []
+        recorded = {}
+        for flow_id, snapshot in snapshots.items():
+            checksum = snapshot_checksum(snapshot["nodes"], snapshot["edges"])
+            last = self._versions.get(flow_id)
+            # 내용이 같거나 직전 기록 후 FLOW_VERSION_INTERVAL이 지나지 않았으면 건너뜀
+            if last is not None and (
+                last[0] == checksum
+                or time.monotonic() - last[1] < FLOW_VERSION_INTERVAL
+            ):
+                continue
+            documents.append(
+                {
+                    "flow_id": Binary.from_uuid(UUID(flow_id)),
+                    "nodes": snapshot["nodes"],
+                    "edges": snapshot["edges"],
+                    "created_at": now,
+                }
+            )
+            recorded[flow_id] = (checksum, time.monotonic())
+        if not documents:
+            return
+        try:
+            await FlowVersion.get_motor_collection().insert_many(
+                documents, ordered=False
+            )
+        except Exception as e:
+            logger.warning(f"Flow version write failed: {e}")
+            flow_snapshot_writes.inc(len(documents), outcome="version_failed")
+            return
+        for flow_id, version in recorded.items():
+            self._versions.set(flow_id, version)
+        flow_snapshot_writes.inc(len(documents), outcome="versioned")
+
+
+flow_snapshots = FlowSnapshotWriter(
+    loader=liveblock.fetch_storage, room_loader=liveblock.get_room
+)
@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+from app.redisconn import get_redis_pool
+from utils.log import Logger
+from utils.metrics import Counter
+from utils.request import BaseRequest
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+GOOGLE_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+GOOGLE_SEARCH_CONCURRENCY = int(os.getenv("GOOGLE_SEARCH_CONCURRENCY", "4"))
+GOOGLE_SEARCH_CACHE_TTL = int(os.getenv("GOOGLE_SEARCH_CACHE_TTL", str(60 * 60 * 24)))
+
+google_search_requests = Counter(
+    "google_search_requests_total", "Google Custom Search lookups by result"
+)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def search_cache_key(query: str, num_results: int, search_type: str | None) -> str:
+    digest = hashlib.sha1(normalize_query(query).encode()).hexdigest()
+    return f"google:{search_type or 'web'}:{num_results}:{digest}"
+
+
+class GoogleSearch(BaseRequest):
+    def __init__(self):
+        super().__init__(vendor="google")
+        self.semaphore = asyncio.BoundedSemaphore(GOOGLE_SEARCH_CONCURRENCY)
+
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    async def search(
+        self,
+        api_key: str,
+        search_engine_id: str,
+        query: str,
+        num_results: int,
+        search_type: str | None = None,
+    ):
+        params = {
+            "key": api_key,
+            "cx": search_engine_id,
+            "q": query,
+            "num": num_results,
+        }
+        if search_type:
+            params["searchType"] = search_type
+        return await self.get(GOOGLE_SEARCH_URL, params=params)
+
+    async def search_links(
+        self,
+        api_key: str,
+        search_engine_id: str,
+        query: str,
+        num_results: int,
+        search_type: str | None = None,
+    ) -> list[str]:
+        cache_key = search_cache_key(query, num_results, search_type)
+        try:
+            cached = await self.redis_connection.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Google search cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            google_search_requests.inc(result="cached")
+            return json.loads(cached)
+
+        async with self.semaphore:
+            async with await self.search(
+                api_key, search_engine_id, query, num_results, search_type
+            ) as response:
+                if response.status != 200:
+                    google_search_requests.inc(result="error")
+                    raise RuntimeError(
+                        f"Google API error: {response.status} {response.reason}"
+                    )
+                results = await response.json()
+        links = [item.get("link") for item in results.get("items", [])]
+        google_search_requests.inc(result="fetched")
+
+        try:
+            await self.redis_connection.set(
+                cache_key, json.dumps(links), ex=GOOGLE_SEARCH_CACHE_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Google search cache write failed: {e}")
+        return links
+
+
+google_search = GoogleSearch()
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from app.redisconn import get_redis_pool
+from utils.log import Logger
+from utils.metrics import Counter, Gauge
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+JOB_KEY_PREFIX = "job:"
+
+# 실행 시각이 지난 지연 작업을 ready 리스트로 옮김
+PROMOTE_DUE_JOBS = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('LPUSH', KEYS[2], id)
+end
+return #ids
+"""
+
+# 하트비트가 끊긴 워커의 processing 리스트에 남은 작업을 ready 리스트로 되돌림
+# 먼저 꺼냈던 작업이 다시 먼저 실행되도록 ready 리스트의 오른쪽(꺼내는 쪽)에 넣음
+REQUEUE_STALE_JOBS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return -1
+end
+local moved = 0
+while redis.call('LMOVE', KEYS[2], KEYS[3], 'LEFT', 'RIGHT') do
+    moved = moved + 1
+end
+redis.call('SREM', KEYS[4], ARGV[1])
+return moved
+"""
+
+job_queue_jobs = Counter(
+    "job_queue_jobs_total", "Background jobs by queue and outcome"
+)
+job_queue_depth = Gauge("job_queue_depth", "Jobs waiting in a background queue")
+
+JobHandler = Callable[[dict], Awaitable[Any]]
+
+
+def job_key(job_id: str) -> str:
+    return JOB_KEY_PREFIX + job_id
+
+
+class JobQueue:
+    def __init__(
+        self,
+        name: str,
+        handler: JobHandler,
+        concurrency: int = 1,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        result_ttl: int = 60 * 60 * 24,
+        dedupe_ttl: int = 60 * 60,
+        heartbeat_ttl: int = 60,
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.result_ttl = result_ttl
+        self.dedupe_ttl = dedupe_ttl
+        self.ready_key = f"jobs:{name}:ready"
+        self.delayed_key = f"jobs:{name}:delayed"
+        self.workers_key = f"jobs:{name}:workers"
+        self.worker_id = uuid.uuid4().hex
+        self.heartbeat_ttl = heartbeat_ttl
+        self._workers: list[asyncio.Task] = []
+        self._heartbeat: asyncio.Task | None = None
+        self._last_depth = 0
+
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    def processing_key(self, worker_id: str) -> str:
+        return f"jobs:{self.name}:processing:{worker_id}"
+
+    def heartbeat_key(self, worker_id: str) -> str:
+        return f"jobs:{self.name}:worker:{worker_id}"
+
+    def dedupe_key(self, key: str) -> str:
+        return f"jobs:{self.name}:dedupe:{key}"
+
+    async def enqueue(self, payload: dict, dedupe_key: str | None = None) -> str:
+        job_id = uuid.uuid4().hex
+        if dedupe_key is not None:
+            claimed = await self.redis_connection.set(
+                self.dedupe_key(dedupe_key), job_id, nx=True, ex=self.dedupe_ttl
+            )
+            if not claimed:
+                existing = await self.redis_connection.get(
+                    self.dedupe_key(dedupe_key)
+                )
+                if existing is not None:
+                    job_queue_jobs.inc(queue=self.name, outcome="deduplicated")
+                    return existing.decode()
+        async with self.redis_connection.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                job_key(job_id),
+                mapping={
+                    "queue": self.name,
+                    "status": "queued",
+                    "payload": json.dumps(payload),
+                    "attempts": 0,
+                    "dedupe": dedupe_key or "",
+                },
+            )
+            pipe.expire(job_key(job_id), self.result_ttl)
+            pipe.lpush(self.ready_key, job_id)
+            await pipe.execute()
+        job_queue_jobs.inc(queue=self.name, outcome="enqueued")
+        return job_id
+
+    async def get(self, job_id: str) -> dict | None:
+        job = await self.redis_connection.hgetall(job_key(job_id))
+        if not job:
+            return None
+        job = {key.decode(): value.decode() for key, value in job.items()}
+        return {
+            "id": job_id,
+            "status": job.get("status"),
+            "attempts": int(job.get("attempts", 0)),
+            "result": json.loads(job["result"]) if "result" in job else None,
+            "error": job.get("error"),
+        }
+
+    async def wait(
+        self, job_id: str, timeout: float, interval: float = 0.5
+    ) -> dict | None:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            if time.monotonic() + interval > deadline:
+                return job
+            await asyncio.sleep(interval)
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        job_queue_depth.set_function(lambda: self._last_depth, queue=self.name)
+        await self._beat()
+        await self.requeue_stale()
+        self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+        # 처리 중에 취소된 작업은 다른 워커가 이어받도록 바로 되돌림
+        try:
+            await self.redis_connection.delete(self.heartbeat_key(self.worker_id))
+            await self._requeue(self.worker_id)
+        except Exception as e:
+            logger.warning(
+                f"Failed to requeue jobs of {self.name}:{self.worker_id}: {e}"
+            )
+
+    async def _beat(self) -> None:
+        async with self.redis_connection.pipeline(transaction=True) as pipe:
+            pipe.sadd(self.workers_key, self.worker_id)
+            pipe.set(self.heartbeat_key(self.worker_id), 1, ex=self.heartbeat_ttl)
+            await pipe.execute()
+
+    async def _requeue(self, worker_id: str) -> int:
+        return await self.redis_connection.eval(
+            REQUEUE_STALE_JOBS,
+            4,
+            self.heartbeat_key(worker_id),
+            self.processing_key(worker_id),
+            self.ready_key,
+            self.workers_key,
+            worker_id,
+        )
+
+    async def requeue_stale(self) -> int:
+        requeued = 0
+        for member in await self.redis_connection.smembers(self.workers_key):
+            worker_id = member.decode()
+            if worker_id == self.worker_id:
+                continue
+            moved = await self._requeue(worker_id)
+            if moved > 0:
+                logger.warning(
+                    f"Requeued {moved} jobs left by stale worker "
+                    f"{self.name}:{worker_id}"
+                )
+                job_queue_jobs.inc(moved, queue=self.name, outcome="requeued")
+                requeued += moved
+        return requeued
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_ttl / 3)
+            try:
+                await self._beat()
+                await self.requeue_stale()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job queue {self.name} heartbeat failed: {e}")
+
+    async def _work(self) -> None:
+        processing_key = self.processing_key(self.worker_id)
+        while True:
+            try:
+                await self.redis_connection.eval(
+                    PROMOTE_DUE_JOBS, 2, self.delayed_key, self.ready_key, time.time()
+                )
+                self._last_depth = await self.redis_connection.llen(self.ready_key)
+                # 꺼낸 작업은 끝날 때까지 이 워커의 processing 리스트에 남겨 둠
+                job_id = await self.redis_connection.blmove(
+                    self.ready_key, processing_key, 1, src="RIGHT", dest="LEFT"
+                )
+                if job_id is None:
+                    continue
+                # 취소되거나 Redis 오류로 중단된 작업은 리스트에 남아 나중에 되돌려짐
+                await self._process(job_id.decode())
+                await self.redis_connection.lrem(processing_key, 1, job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job queue {self.name} worker error: {e}")
+                await asyncio.sleep(1)
+
+    async def _process(self, job_id: str) -> None:
+        key = job_key(job_id)
+        payload = await self.redis_connection.hget(key, "payload")
+        if payload is None:
+            return
+        attempts = await self.redis_connection.hincrby(key, "attempts", 1)
+        await self.redis_connection.hset(key, "status", "running")
+        job_payload = json.loads(payload)
+        try:
+            result = await self.handler(job_payload)
+        except Exception as e:
+            if attempts >= self.max_attempts:
+                logger.error(f"Job {self.name}:{job_id} failed: {e}")
+                dedupe_key = await self.redis_connection.hget(key, "dedupe")
+                async with self.redis_connection.pipeline(transaction=True) as pipe:
+                    pipe.hset(key, mapping={"status": "failed", "error": str(e)})
+                    # 실패한 작업은 같은 요청이 다시 들어오면 새로 시도할 수 있게 함
+                    if dedupe_key:
+                        pipe.delete(self.dedupe_key(dedupe_key.decode()))
+                    await pipe.execute()
+                job_queue_jobs.inc(queue=self.name, outcome="failed")
+                return
+            delay = random.uniform(0, self.backoff * 2 ** (attempts - 1))
+            logger.warning(
+                f"Job {self.name}:{job_id} attempt {attempts} failed, "
+                f"retrying in {delay:.1f}s: {e}"
+            )
+            async with self.redis_connection.pipeline(transaction=True) as pipe:
+                # 핸들러가 payload에 남긴 진행 상황을 다음 시도에 넘겨줌
+                pipe.hset(
+                    key,
+                    mapping={
+                        "status": "retrying",
+                        "error": str(e),
+                        "payload": json.dumps(job_payload),
+                    },
+                )
+                pipe.zadd(self.delayed_key, {job_id: time.time() + delay})
+                await pipe.execute()
+            job_queue_jobs.inc(queue=self.name, outcome="retried")
+            return
+        await self.redis_connection.hset(
+            key, mapping={"status": "done", "result": json.dumps(result)}
+        )
+        job_queue_jobs.inc(queue=self.name, outcome="done")
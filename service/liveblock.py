@@ -1,14 +1,26 @@
+import asyncio
+import logging
 import os
-from aiohttp import ClientSession
+import time
+from typing import AsyncIterator
 from utils.request import BaseRequest
 from entity.user import User as ODMuser
+from service.roomcache import room_cache
+from utils.log import Logger
+
+# 응답 본문 전체를 남기는 디버그 로그는 일부만 샘플링
+logger = Logger.create(__name__, level=logging.DEBUG, sample_rate=0.1)
 
 LIVEBLOCK_SECRET_KEY = os.getenv("LIVEBLOCK_SECRET_KEY")
+ROOM_READY_TIMEOUT = 3.0
+ROOM_READY_INITIAL_DELAY = 0.05
+ROOM_READY_MAX_DELAY = 0.5
+ROOM_PAGE_SIZE = 100
 
 
 class LiveBlock(BaseRequest):
     def __init__(self):
-        super().__init__()
+        super().__init__(vendor="liveblocks")
 
     async def create_token(self, odm_user: ODMuser, groups: list[str] = None) -> dict:
         request_data = {
@@ -35,6 +47,24 @@ class LiveBlock(BaseRequest):
         )
         return await response.json()
 
+    async def iter_rooms(
+        self, page_size: int = ROOM_PAGE_SIZE, **params
+    ) -> AsyncIterator[dict]:
+        # nextCursor를 따라 모든 페이지의 방을 순서대로 돌려줌
+        starting_after = None
+        while True:
+            page_params = {**params, "limit": page_size}
+            if starting_after:
+                page_params["startingAfter"] = starting_after
+            result = await self.search_rooms(**page_params)
+            if "error" in result:
+                raise RuntimeError(f"Liveblocks room search failed: {result}")
+            for room in result.get("data", []):
+                yield room
+            starting_after = result.get("nextCursor")
+            if not starting_after:
+                return
+
     async def fetch_room(self, room_id: str) -> dict:
         response = await self.get(
             f"https://api.liveblocks.io/v2/rooms/{room_id}",
@@ -42,6 +72,17 @@ class LiveBlock(BaseRequest):
         )
         return await response.json()
 
+    async def get_room(self, room_id: str) -> dict:
+        return await room_cache.get(room_id, self.fetch_room)
+
+    async def fetch_storage(self, room_id: str) -> dict:
+        response = await self.get(
+            f"https://api.liveblocks.io/v2/rooms/{room_id}/storage",
+            params={"format": "json"},
+            headers={"Authorization": "Bearer " + LIVEBLOCK_SECRET_KEY},
+        )
+        return await response.json()
+
     async def fetch_active_users(self, room_id: str) -> dict:
         response = await self.get(
             f"https://api.liveblocks.io/v2/rooms/{room_id}/active_users",
@@ -55,7 +96,12 @@ class LiveBlock(BaseRequest):
             json=data,
             headers={"Authorization": "Bearer " + LIVEBLOCK_SECRET_KEY},
         )
-        return await response.json()
+        room = await response.json()
+        if response.status == 200 and room.get("id") == room_id:
+            await room_cache.put(room)
+        else:
+            await room_cache.invalidate(room_id)
+        return room
 
     async def create_room(
         self,
@@ -76,8 +122,11 @@ class LiveBlock(BaseRequest):
             json=request_data,
             headers={"Authorization": "Bearer " + LIVEBLOCK_SECRET_KEY},
         )
-        print(await response.text())
-        return await response.json()
+        room = await response.json()
+        logger.debug(f"Create room {room_id}: {response.status} {room}")
+        if response.status == 200 and room.get("id") == room_id:
+            await room_cache.put(room)
+        return room
 
     async def set_document(self, room_id: str, document: dict) -> dict:
         response = await self.post(
@@ -88,8 +137,24 @@ class LiveBlock(BaseRequest):
             },
             headers={"Authorization": "Bearer " + LIVEBLOCK_SECRET_KEY},
         )
-        print(await response.text())
-        return await response.json()
+        result = await response.json()
+        logger.debug(f"Set document {room_id}: {response.status} {result}")
+        return result
+
+    async def set_document_when_ready(
+        self, room_id: str, document: dict, timeout: float = ROOM_READY_TIMEOUT
+    ) -> dict:
+        # 방 생성 직후에는 storage API가 ROOM_NOT_FOUND를 줄 수 있어 짧게 재시도
+        deadline = time.monotonic() + timeout
+        delay = ROOM_READY_INITIAL_DELAY
+        while True:
+            result = await self.set_document(room_id=room_id, document=document)
+            if result.get("error") != "ROOM_NOT_FOUND":
+                return result
+            if time.monotonic() + delay > deadline:
+                return result
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, ROOM_READY_MAX_DELAY)
 
     async def broadcast(self, room_id: str, data: dict) -> dict:
         response = await self.post(
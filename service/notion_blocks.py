@@ -0,0 +1,170 @@
+import re
+
+# Notion API 제한
+NOTION_MAX_CHILDREN = 100
+NOTION_MAX_TEXT = 2000
+NOTION_MAX_RICH_TEXT = 100
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
+BULLET_PATTERN = re.compile(r"^\s*[-*+]\s+(.*)$")
+NUMBERED_PATTERN = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+QUOTE_PATTERN = re.compile(r"^>\s?(.*)$")
+DIVIDER_PATTERN = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+FENCE_PATTERN = re.compile(r"^\s*```\s*([\w+#-]*)\s*$")
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)|(https?://[^\s)]+)")
+
+CODE_LANGUAGES = {
+    "bash",
+    "c",
+    "c++",
+    "c#",
+    "css",
+    "go",
+    "html",
+    "java",
+    "javascript",
+    "json",
+    "kotlin",
+    "markdown",
+    "python",
+    "ruby",
+    "rust",
+    "shell",
+    "sql",
+    "swift",
+    "typescript",
+    "yaml",
+}
+CODE_LANGUAGE_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "sh": "shell",
+    "yml": "yaml",
+    "md": "markdown",
+    "cpp": "c++",
+    "csharp": "c#",
+}
+
+
+def text_segment(content: str, url: str | None = None) -> dict:
+    text = {"content": content}
+    if url:
+        text["link"] = {"url": url}
+    return {"type": "text", "text": text}
+
+
+def split_text(content: str, url: str | None = None) -> list[dict]:
+    if not content:
+        return []
+    return [
+        text_segment(content[start : start + NOTION_MAX_TEXT], url)
+        for start in range(0, len(content), NOTION_MAX_TEXT)
+    ]
+
+
+def rich_text(content: str) -> list[dict]:
+    segments = []
+    cursor = 0
+    for match in LINK_PATTERN.finditer(content):
+        segments.extend(split_text(content[cursor : match.start()]))
+        if match.group(3):
+            segments.extend(split_text(match.group(3), match.group(3)))
+        else:
+            segments.extend(split_text(match.group(1), match.group(2)))
+        cursor = match.end()
+    segments.extend(split_text(content[cursor:]))
+    return segments
+
+
+def text_blocks(block_type: str, content: str) -> list[dict]:
+    segments = rich_text(content)
+    # rich_text 배열 길이 제한을 넘으면 같은 타입의 블록으로 나눔
+    return [
+        {
+            "object": "block",
+            "type": block_type,
+            block_type: {"rich_text": segments[start : start + NOTION_MAX_RICH_TEXT]},
+        }
+        for start in range(0, max(len(segments), 1), NOTION_MAX_RICH_TEXT)
+    ]
+
+
+def link_block(url: str) -> dict:
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {"rich_text": split_text(url, url)},
+    }
+
+
+def image_block(url: str) -> dict:
+    return {
+        "object": "block",
+        "type": "image",
+        "image": {"type": "external", "external": {"url": url}},
+    }
+
+
+def code_blocks(code: str, language: str) -> list[dict]:
+    language = CODE_LANGUAGE_ALIASES.get(language.lower(), language.lower())
+    if language not in CODE_LANGUAGES:
+        language = "plain text"
+    segments = split_text(code) or [text_segment("")]
+    return [
+        {
+            "object": "block",
+            "type": "code",
+            "code": {
+                "rich_text": segments[start : start + NOTION_MAX_RICH_TEXT],
+                "language": language,
+            },
+        }
+        for start in range(0, len(segments), NOTION_MAX_RICH_TEXT)
+    ]
+
+
+def compile_markdown(markdown: str) -> list[dict]:
+    blocks = []
+    code_language = None
+    code_lines: list[str] = []
+
+    for line in markdown.split("\n"):
+        fence = FENCE_PATTERN.match(line)
+        if code_language is not None:
+            if fence and not fence.group(1):
+                blocks.extend(code_blocks("\n".join(code_lines), code_language))
+                code_language = None
+                code_lines = []
+            else:
+                code_lines.append(line)
+            continue
+        if fence:
+            code_language = fence.group(1)
+            continue
+
+        if not line.strip():
+            continue
+        if match := HEADING_PATTERN.match(line):
+            level = len(match.group(1))
+            block_type = f"heading_{level}" if level <= 3 else "paragraph"
+            blocks.extend(text_blocks(block_type, match.group(2).strip()))
+        elif DIVIDER_PATTERN.match(line):
+            blocks.append({"object": "block", "type": "divider", "divider": {}})
+        elif match := BULLET_PATTERN.match(line):
+            blocks.extend(text_blocks("bulleted_list_item", match.group(1)))
+        elif match := NUMBERED_PATTERN.match(line):
+            blocks.extend(text_blocks("numbered_list_item", match.group(1)))
+        elif match := QUOTE_PATTERN.match(line):
+            blocks.extend(text_blocks("quote", match.group(1)))
+        else:
+            blocks.extend(text_blocks("paragraph", line.strip()))
+
+    # 닫히지 않은 코드 블록도 잃지 않도록 그대로 내보냄
+    if code_language is not None:
+        blocks.extend(code_blocks("\n".join(code_lines), code_language))
+    return blocks
+
+
+def chunk_blocks(blocks: list[dict], size: int = NOTION_MAX_CHILDREN) -> list[list]:
+    return [blocks[start : start + size] for start in range(0, len(blocks), size)]
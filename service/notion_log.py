@@ -1,7 +1,19 @@
-import aiohttp
+import logging
 import os
 from urllib.parse import urlparse
 
+from service.notion_blocks import (
+    chunk_blocks,
+    compile_markdown,
+    image_block,
+    link_block,
+    text_blocks,
+)
+from utils.log import Logger
+from utils.request import BaseRequest
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
 # import json
 # import asyncio
 
@@ -9,6 +21,8 @@ from urllib.parse import urlparse
 # Notion API 설정
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
+# 로컬 fake 서버(script/notion/fake_server.py)로 바꿔 테스트할 수 있음
+NOTION_API_URL = os.getenv("NOTION_API_URL", "https://api.notion.com")
 
 headers = {
     "Authorization": f"Bearer {NOTION_TOKEN}",
@@ -16,6 +30,14 @@ headers = {
     "Notion-Version": "2022-06-28",
 }
 
+notion = BaseRequest(vendor="notion")
+
+
+class NotionError(Exception):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"Notion API error {status}: {body}")
+        self.status = status
+
 
 def is_valid_image_url(url):
     valid_extensions = (".jpg", ".jpeg", ".png")
@@ -24,144 +46,75 @@ def is_valid_image_url(url):
     return path.lower().endswith(valid_extensions)
 
 
-async def create_page_with_images(
-    session, title, markdown_content, image_urls, search_urls
-):
-    url = f"https://api.notion.com/v1/pages"
-
-    # 마크다운 내용을 줄 단위로 분리
-    lines = markdown_content.split("\n")
-    children = []
-
-    for line in lines:
-        if line.startswith("#"):
-            # 제목 레벨 확인
-            level = len(line.split()[0])
-            content = line.lstrip("#").strip()
-
-            if level == 1:
-                block_type = "heading_1"
-            elif level == 2:
-                block_type = "heading_2"
-            elif level == 3:
-                block_type = "heading_3"
-            else:
-                block_type = "paragraph"
-
-            children.append(
-                {
-                    "object": "block",
-                    "type": block_type,
-                    block_type: {
-                        "rich_text": [{"type": "text", "text": {"content": content}}]
-                    },
-                }
-            )
-        else:
-            # 일반 텍스트
-            children.append(
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"type": "text", "text": {"content": line}}]
-                    },
-                }
-            )
-
-    children.append(
-        {
-            "object": "block",
-            "type": "heading_3",
-            "heading_3": {
-                "rich_text": [{"type": "text", "text": {"content": "참조 링크"}}]
-            },
-        }
-    )
+def build_children(markdown_content, image_urls, search_urls) -> list[dict]:
+    children = compile_markdown(markdown_content or "")
 
-    for search_url in search_urls:
-        search_url_block = {
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {"content": search_url, "link": {"url": search_url}},
-                    }
-                ]
-            },
-        }
-        children.append(search_url_block)
-
-    children.append(
-        {
-            "object": "block",
-            "type": "heading_3",
-            "heading_3": {
-                "rich_text": [{"type": "text", "text": {"content": "참조 이미지"}}]
-            },
-        }
-    )
+    children.extend(text_blocks("heading_3", "참조 링크"))
+    children.extend(link_block(search_url) for search_url in search_urls)
+
+    children.extend(text_blocks("heading_3", "참조 이미지"))
     # 필터링된 이미지 URL 리스트
     filtered_image_urls = [url for url in image_urls if is_valid_image_url(url)]
 
-    # 이미지 블록 추가
+    # 이미지 블록과 이미지 URL 텍스트 추가
     for image_url in filtered_image_urls:
-        image_block = {
-            "object": "block",
-            "type": "image",
-            "image": {"type": "external", "external": {"url": image_url}},
-        }
-        children.append(image_block)
-
-        # 이미지 URL을 텍스트로 추가
-        image_url_block = {
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": image_url,  # 표시할 텍스트로 이미지 URL 사용
-                            "link": {"url": image_url},  # URL을 하이퍼링크로 추가
-                        },
-                    }
-                ]
-            },
-        }
-        children.append(image_url_block)
+        children.append(image_block(image_url))
+        children.append(link_block(image_url))
+    return children
 
+
+async def append_children(page_id: str, children: list[dict]) -> None:
+    url = f"{NOTION_API_URL}/v1/blocks/{page_id}/children"
+    async with await notion.patch(
+        url, headers=headers, json={"children": children}
+    ) as response:
+        if response.status != 200:
+            raise NotionError(response.status, await response.text())
+
+
+async def create_page_with_images(
+    title, markdown_content, image_urls, search_urls, progress: dict | None = None
+):
+    url = f"{NOTION_API_URL}/v1/pages"
+    # 작업 재시도 시 이미 만든 페이지와 붙인 chunk를 다시 만들지 않도록 진행 상황을 기록
+    progress = {} if progress is None else progress
+
+    chunks = chunk_blocks(build_children(markdown_content, image_urls, search_urls))
     payload = {
         "parent": {"database_id": DATABASE_ID},
         "properties": {"title": {"title": [{"text": {"content": title}}]}},
-        "children": children,
+        "children": chunks[0] if chunks else [],
     }
 
     text_context = []
-    text_context.append(lines)
+    text_context.append((markdown_content or "").split("\n"))
     text_context.append(image_urls)
     text_context.append(search_urls)
 
-    async with session.post(url, headers=headers, json=payload) as response:
-        if response.status == 200:
-            print(f"페이지 '{title}'이(가) 성공적으로 생성되었습니다.")
+    page_id = progress.get("page_id")
+    if page_id is None:
+        async with await notion.post(url, headers=headers, json=payload) as response:
+            if response.status != 200:
+                raise NotionError(response.status, await response.text())
             new_page = await response.json()
-            page_id = new_page["id"]
-
-            page_url = f"https://www.notion.so/{page_id.replace('-', '')}"
-
-            converted_url = convert_notion_url(page_url)
+        page_id = new_page["id"]
+        progress["page_id"] = page_id
+        progress["appended"] = 1
+    else:
+        logger.info(
+            f"Resuming Notion page {page_id} from chunk {progress.get('appended', 1)}"
+        )
 
-            print(f"Page created successfully! You can view it at: {converted_url}")
+    # 페이지당 children 제한 때문에 나머지는 순서대로 이어붙임
+    for index in range(progress.get("appended", 1), len(chunks)):
+        await append_children(page_id, chunks[index])
+        progress["appended"] = index + 1
 
-            json_return = {"page_url": converted_url, "text_context": text_context}
-            return json_return
+    page_url = f"https://www.notion.so/{page_id.replace('-', '')}"
+    converted_url = convert_notion_url(page_url)
+    logger.info(f"Notion page '{title}' created: {converted_url}")
 
-        else:
-            print(f"오류 발생: {response.status}")
-            print(await response.text())
+    return {"page_url": converted_url, "text_context": text_context}
 
 
 def convert_notion_url(original_url):
@@ -171,11 +124,9 @@ def convert_notion_url(original_url):
     return new_url
 
 
-async def notionlog(main_title, markdown_content, image_urls, search_urls):
-    try:
-        async with aiohttp.ClientSession() as session:
-            return await create_page_with_images(
-                session, main_title, markdown_content, image_urls, search_urls
-            )
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
+async def notionlog(
+    main_title, markdown_content, image_urls, search_urls, progress: dict | None = None
+):
+    return await create_page_with_images(
+        main_title, markdown_content, image_urls, search_urls, progress
+    )
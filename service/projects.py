@@ -0,0 +1,162 @@
+import base64
+import bisect
+import logging
+import os
+import re
+from datetime import datetime
+
+from app.redisconn import get_redis_pool
+from service.liveblock import liveblock
+from utils import codec
+from utils.cache import SingleFlight
+from utils.log import Logger
+from utils.metrics import Counter
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+PROJECT_LIST_TTL = int(os.getenv("PROJECT_LIST_TTL", "300"))
+# 최신순 정렬을 사전순 정렬로 바꾸기 위해 생성 시각(ms)을 이 값에서 뺌
+SORT_KEY_MAX = 10**13 - 1
+SORT_KEY_PATTERN = re.compile(r"\d{13}:[^:]+")
+
+# 정렬 키가 커서보다 큰 항목을 limit개까지 읽고 항목 내용을 함께 돌려줌
+# 캐시가 만들어졌는지는 count 키로 구분 (프로젝트가 없는 사용자도 캐시)
+READ_PAGE = """
+if redis.call('EXISTS', KEYS[3]) == 0 then
+    return {0, {}, {}}
+end
+local members = redis.call(
+    'ZRANGEBYLEX', KEYS[1], ARGV[1], '+', 'LIMIT', 0, tonumber(ARGV[2])
+)
+if #members == 0 then
+    return {1, {}, {}}
+end
+return {1, members, redis.call('HMGET', KEYS[2], unpack(members))}
+"""
+
+project_list_requests = Counter(
+    "project_list_requests_total", "Project list page lookups by cache result"
+)
+
+
+class InvalidProjectCursor(ValueError):
+    pass
+
+
+def project_keys(user_id: str) -> tuple[str, str, str]:
+    return (
+        f"projects:{user_id}",
+        f"projects:{user_id}:items",
+        f"projects:{user_id}:count",
+    )
+
+
+def project_entry(room: dict) -> dict:
+    return {"id": str(room["id"]), "name": room["metadata"]["start_message"]}
+
+
+def sort_key(room: dict) -> str:
+    # 생성 시각은 바뀌지 않으므로 목록이 다시 만들어져도 커서 위치가 유지됨
+    try:
+        created_at = datetime.fromisoformat(room["createdAt"].replace("Z", "+00:00"))
+        millis = int(created_at.timestamp() * 1000)
+    except (KeyError, AttributeError, ValueError):
+        millis = 0
+    return f"{SORT_KEY_MAX - millis:013d}:{room['id']}"
+
+
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidProjectCursor(cursor) from e
+    if not SORT_KEY_PATTERN.fullmatch(key):
+        raise InvalidProjectCursor(cursor)
+    return key
+
+
+class ProjectList:
+    def __init__(self, ttl: int = PROJECT_LIST_TTL):
+        self.ttl = ttl
+        self.singleflight = SingleFlight()
+
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    async def page(
+        self, user_id: str, cursor: str | None, limit: int
+    ) -> tuple[list[dict], str | None]:
+        after = None if cursor is None else decode_cursor(cursor)
+        try:
+            built, keys, items = await self.redis_connection.eval(
+                READ_PAGE,
+                3,
+                *project_keys(user_id),
+                "-" if after is None else "(" + after,
+                limit + 1,
+            )
+        except Exception as e:
+            logger.warning(f"Project list cache read failed for {user_id}: {e}")
+            built = 0
+        if built:
+            project_list_requests.inc(result="hit")
+            entries = [
+                (key.decode(), codec.decode(item)) for key, item in zip(keys, items)
+            ]
+        else:
+            project_list_requests.inc(result="miss")
+            projects = await self.singleflight.do(
+                user_id, lambda: self._build(user_id)
+            )
+            start = 0
+            if after is not None:
+                start = bisect.bisect_right([key for key, _ in projects], after)
+            entries = projects[start : start + limit + 1]
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_cursor(entries[-1][0])
+        return [entry for _, entry in entries], next_cursor
+
+    async def _build(self, user_id: str) -> list[tuple[str, dict]]:
+        projects = sorted(
+            [
+                (sort_key(room), project_entry(room))
+                async for room in liveblock.iter_rooms(userId=user_id)
+            ],
+            key=lambda project: project[0],
+        )
+        members_key, items_key, count_key = project_keys(user_id)
+        try:
+            async with self.redis_connection.pipeline(transaction=True) as pipe:
+                pipe.delete(members_key, items_key)
+                if projects:
+                    pipe.zadd(members_key, {key: 0 for key, _ in projects})
+                    pipe.hset(
+                        items_key,
+                        mapping={key: codec.encode(item) for key, item in projects},
+                    )
+                    pipe.expire(members_key, self.ttl)
+                    pipe.expire(items_key, self.ttl)
+                pipe.set(count_key, len(projects), ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Project list cache write failed for {user_id}: {e}")
+        return projects
+
+    async def invalidate(self, *user_ids: str) -> None:
+        keys = [key for user_id in user_ids for key in project_keys(user_id)]
+        if not keys:
+            return
+        try:
+            await self.redis_connection.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Project list invalidation failed for {user_ids}: {e}")
+
+
+project_list = ProjectList()
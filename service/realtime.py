@@ -1,23 +1,208 @@
-import json
+from typing import Literal
 
-from service.credential import get_redis_pool
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+
+from app.redisconn import get_redis_pool
+from entity.flow import Edge, Node
+from utils import codec
+from utils.flow import FlowGraph
+
+REALTIME_COMPACT_THRESHOLD = 100
+
+# 패치를 로그 끝에 붙이고 버전을 올림
+# 불변식: version == 스냅샷 버전 + LLEN(patches)
+APPLY_PATCH = """
+redis.call('RPUSH', KEYS[2], ARGV[1])
+return {redis.call('INCR', KEYS[1]), redis.call('LLEN', KEYS[2])}
+"""
+
+# 읽어간 시점 이후 다른 압축이 없었을 때만 스냅샷을 교체하고 반영된 패치를 잘라냄
+COMPACT = """
+local version = tonumber(redis.call('GET', KEYS[2]) or '0')
+local length = redis.call('LLEN', KEYS[3])
+if version - length ~= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('LTRIM', KEYS[3], tonumber(ARGV[3]), -1)
+return 1
+"""
+
+REPLACE = """
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('DEL', KEYS[3])
+return redis.call('INCR', KEYS[2])
+"""
+
+PatchOp = Literal["add", "update", "remove"]
+PatchKind = Literal["node", "edge"]
+
+
+def apply_patches(data: dict, patches: list[dict]) -> dict:
+    graph = FlowGraph.from_dict(data)
+    for patch in patches:
+        if patch["kind"] == "node":
+            upsert, update, remove = (
+                graph.upsert_node,
+                graph.update_node,
+                graph.remove_node,
+            )
+        else:
+            upsert, update, remove = (
+                graph.upsert_edge,
+                graph.update_edge,
+                graph.remove_edge,
+            )
+        if patch["op"] == "remove":
+            remove(patch["id"])
+        elif patch.get("key") is not None:
+            update(patch["id"], patch["data"], key=patch["key"])
+        else:
+            upsert(patch["data"])
+    return {**data, **graph.to_dict()}
+
+
+def invalid_patch(message: str) -> HTTPException:
+    return HTTPException(
+        status_code=422, detail={"error": "INVALID_PATCH", "message": message}
+    )
+
+
+def validate_patch(op: str, kind: str, item_id: str, data, key: str | None) -> None:
+    # 로그에 들어간 패치는 get()/compact() 때마다 다시 적용되므로 미리 모양을 검사
+    if op not in ("add", "update", "remove") or kind not in ("node", "edge"):
+        raise invalid_patch(f"Unsupported patch {op} {kind}")
+    if op == "remove":
+        return
+    model = Node if kind == "node" else Edge
+    try:
+        if key is None:
+            # 필드 하나를 바꾸는 패치는 null로 지울 수 있지만 전체 교체에는 데이터가 필요
+            if data is None:
+                raise invalid_patch(f"Patch {op} {kind} requires data")
+            model.model_validate(data)
+            if data["id"] != item_id:
+                raise invalid_patch(f"Patch id {item_id} does not match data")
+        elif key == "id":
+            raise invalid_patch(f"{kind} id cannot be changed")
+        elif key in model.model_fields:
+            TypeAdapter(model.model_fields[key].annotation).validate_python(data)
+    except ValidationError as e:
+        errors = e.errors(include_url=False, include_input=False)
+        raise invalid_patch(f"Invalid {kind} data: {errors}")
 
 
 class RealtimeUserSession:
-    def __init__(self):
-        self.redis_connection = get_redis_pool()
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    @staticmethod
+    def _keys(flow_id: str) -> tuple[str, str, str]:
+        prefix = f"realtime:{flow_id}"
+        return f"{prefix}:snapshot", f"{prefix}:version", f"{prefix}:patches"
+
+    async def update(self, flow_id: str, data: dict) -> int:
+        snapshot_key, version_key, patches_key = self._keys(flow_id)
+        version = await self.redis_connection.eval(
+            REPLACE, 3, snapshot_key, version_key, patches_key, codec.encode(data)
+        )
+        await self.redis_connection.hdel("realtime", flow_id)
+        return version
 
-    async def update(self, flow_id: str, data: dict) -> None:
-        await self.redis_connection.hset("realtime", flow_id, json.dumps(data))
+    async def patch(
+        self,
+        flow_id: str,
+        op: PatchOp,
+        kind: PatchKind,
+        item_id: str,
+        data: dict | None = None,
+        key: str | None = None,
+    ) -> int:
+        validate_patch(op, kind, item_id, data, key)
+        _, version_key, patches_key = self._keys(flow_id)
+        encoded = codec.encode(
+            {"op": op, "kind": kind, "id": item_id, "data": data, "key": key}
+        )
+        version, pending = await self.redis_connection.eval(
+            APPLY_PATCH, 2, version_key, patches_key, encoded
+        )
+        if pending >= REALTIME_COMPACT_THRESHOLD:
+            await self.compact(flow_id)
+        return version
+
+    async def _read(self, flow_id: str) -> tuple[int, dict, list[dict]]:
+        snapshot_key, version_key, patches_key = self._keys(flow_id)
+        async with self.redis_connection.pipeline(transaction=True) as pipe:
+            pipe.get(snapshot_key)
+            pipe.get(version_key)
+            pipe.lrange(patches_key, 0, -1)
+            snapshot, version, patches = await pipe.execute()
+        if snapshot is not None:
+            data = codec.decode(snapshot)
+        else:
+            # 이전 버전의 realtime 해시에 전체 상태가 남아있으면 기준 스냅샷으로 사용
+            legacy = await self.redis_connection.hget("realtime", flow_id)
+            if legacy is not None:
+                data = codec.decode(legacy)
+            elif patches:
+                data = {"nodes": [], "edges": []}
+            else:
+                return 0, None, []
+        return int(version or 0), data, [codec.decode(patch) for patch in patches]
+
+    async def get_versioned(self, flow_id: str) -> tuple[int, dict]:
+        version, data, patches = await self._read(flow_id)
+        if data is None:
+            return version, None
+        return version, apply_patches(data, patches)
 
     async def get(self, flow_id: str) -> dict:
-        data = await self.redis_connection.hget("realtime", flow_id)
-        return json.loads(data)
+        _, data = await self.get_versioned(flow_id)
+        return data
+
+    async def get_patches_since(
+        self, flow_id: str, version: int
+    ) -> list[dict] | None:
+        # 요청한 버전이 이미 스냅샷으로 압축되었으면 None을 돌려 전체 재조회를 유도
+        current, _, patches = await self._read(flow_id)
+        base = current - len(patches)
+        if version < base:
+            return None
+        return [
+            {"version": base + index + 1, **patch}
+            for index, patch in enumerate(patches)
+            if base + index + 1 > version
+        ]
+
+    async def compact(self, flow_id: str) -> bool:
+        version, data, patches = await self._read(flow_id)
+        if data is None:
+            return False
+        snapshot_key, version_key, patches_key = self._keys(flow_id)
+        compacted = await self.redis_connection.eval(
+            COMPACT,
+            3,
+            snapshot_key,
+            version_key,
+            patches_key,
+            codec.encode(apply_patches(data, patches)),
+            version - len(patches),
+            len(patches),
+        )
+        if compacted:
+            await self.redis_connection.hdel("realtime", flow_id)
+        return bool(compacted)
 
     async def delete(self, flow_id: str) -> None:
+        await self.redis_connection.delete(*self._keys(flow_id))
         await self.redis_connection.hdel("realtime", flow_id)
 
     async def exists(self, flow_id: str) -> bool:
+        snapshot_key, _, patches_key = self._keys(flow_id)
+        if await self.redis_connection.exists(snapshot_key, patches_key):
+            return True
         return await self.redis_connection.hexists("realtime", flow_id)
 
 
@@ -0,0 +1,41 @@
+import os
+from datetime import datetime
+from uuid import UUID
+
+from bson import Binary
+
+from entity.user import RecentFlow, User as ODMUser, UserRecent
+
+RECENT_FLOWS_LIMIT = int(os.getenv("RECENT_FLOWS_LIMIT", "20"))
+
+
+async def record_visit(user_id: UUID, flow_id: str, name: str | None = None) -> None:
+    entry = RecentFlow(flow_id=flow_id, name=name, visited_at=datetime.utcnow())
+    # 같은 flow의 이전 기록을 빼고 끝에 붙인 뒤 최근 N개만 남기는 것을 한 번의 갱신으로 처리
+    # 동시에 들어온 방문이 서로 끼어들어 중복 기록이 생기지 않음
+    # 사용자 입력이 "$"로 시작해도 필드 경로로 해석되지 않도록 $literal로 감쌈
+    recent = {
+        "$concatArrays": [
+            {
+                "$filter": {
+                    "input": {"$ifNull": ["$recent", []]},
+                    "as": "item",
+                    "cond": {"$ne": ["$$item.flow_id", {"$literal": flow_id}]},
+                }
+            },
+            [{"$literal": entry.model_dump()}],
+        ]
+    }
+    await ODMUser.get_motor_collection().update_one(
+        {"_id": Binary.from_uuid(user_id)},
+        [{"$set": {"recent": {"$slice": [recent, -RECENT_FLOWS_LIMIT]}}}],
+    )
+
+
+async def get_recent_flows(user_id: UUID) -> list[dict]:
+    result = await ODMUser.find_one(
+        ODMUser.id == user_id, projection_model=UserRecent
+    )
+    if result is None:
+        return []
+    return result.recent[::-1][:RECENT_FLOWS_LIMIT]
@@ -0,0 +1,108 @@
+import copy
+import json
+import logging
+import os
+from typing import Awaitable, Callable
+
+from app.redisconn import get_redis_pool
+from service.cachebus import cache_bus
+from utils.cache import SingleFlight, TTLCache
+from utils.log import Logger
+from utils.metrics import Counter
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+ROOM_CACHE_CHANNEL = "cache:room"
+ROOM_KEY_PREFIX = "room:"
+ROOM_CACHE_TTL = int(os.getenv("ROOM_CACHE_TTL", "60"))
+ROOM_CACHE_LOCAL_TTL = float(os.getenv("ROOM_CACHE_LOCAL_TTL", "5"))
+ROOM_CACHE_SIZE = int(os.getenv("ROOM_CACHE_SIZE", "2000"))
+
+room_cache_requests = Counter(
+    "room_cache_requests_total", "Liveblocks room lookups by cache tier"
+)
+
+
+def room_key(room_id: str) -> str:
+    return ROOM_KEY_PREFIX + room_id
+
+
+class RoomCache:
+    def __init__(self, maxsize: int, local_ttl: float, ttl: int):
+        self.local = TTLCache(maxsize=maxsize, ttl=local_ttl)
+        self.ttl = ttl
+        self.singleflight = SingleFlight()
+
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    async def get(
+        self, room_id: str, loader: Callable[[str], Awaitable[dict]]
+    ) -> dict:
+        room = self.local.get(room_id)
+        if room is not None:
+            room_cache_requests.inc(tier="local")
+        else:
+            room = await self.singleflight.do(
+                room_id, lambda: self._load(room_id, loader)
+            )
+        # 호출자가 usersAccesses 등을 수정해도 캐시가 오염되지 않도록 복사본 반환
+        return copy.deepcopy(room)
+
+    async def _load(
+        self, room_id: str, loader: Callable[[str], Awaitable[dict]]
+    ) -> dict:
+        try:
+            cached = await self.redis_connection.get(room_key(room_id))
+        except Exception as e:
+            logger.warning(f"Room cache read failed for {room_id}: {e}")
+            cached = None
+        if cached is not None:
+            room_cache_requests.inc(tier="redis")
+            room = json.loads(cached)
+            self.local.set(room_id, room)
+            return room
+
+        room_cache_requests.inc(tier="miss")
+        room = await loader(room_id)
+        if "error" in room:
+            return room
+        self.local.set(room_id, room)
+        try:
+            # 동시에 write-through된 최신 값을 덮어쓰지 않도록 NX
+            await self.redis_connection.set(
+                room_key(room_id), json.dumps(room), ex=self.ttl, nx=True
+            )
+        except Exception as e:
+            logger.warning(f"Room cache write failed for {room_id}: {e}")
+        return room
+
+    async def put(self, room: dict) -> None:
+        room_id = room["id"]
+        self.local.set(room_id, room)
+        try:
+            await self.redis_connection.set(
+                room_key(room_id), json.dumps(room), ex=self.ttl
+            )
+            await cache_bus.publish(ROOM_CACHE_CHANNEL, {"room_id": room_id})
+        except Exception as e:
+            logger.warning(f"Room cache update failed for {room_id}: {e}")
+
+    async def invalidate(self, room_id: str) -> None:
+        self.local.pop(room_id)
+        try:
+            await self.redis_connection.delete(room_key(room_id))
+            await cache_bus.publish(ROOM_CACHE_CHANNEL, {"room_id": room_id})
+        except Exception as e:
+            logger.warning(f"Room cache invalidation failed for {room_id}: {e}")
+
+    def on_invalidate(self, message: dict) -> None:
+        if message.get("room_id"):
+            self.local.pop(message["room_id"])
+
+
+room_cache = RoomCache(
+    maxsize=ROOM_CACHE_SIZE, local_ttl=ROOM_CACHE_LOCAL_TTL, ttl=ROOM_CACHE_TTL
+)
+cache_bus.subscribe(ROOM_CACHE_CHANNEL, room_cache.on_invalidate)
@@ -0,0 +1,87 @@
+import os
+import logging
+
+from entity.user import User as ODMUser, UserProfile, UserSummary
+from service.cachebus import cache_bus
+from utils.cache import TTLCache
+from utils.log import Logger
+from utils.metrics import Counter, Gauge
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+USER_CACHE_CHANNEL = "cache:user"
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+user_cache_requests = Counter(
+    "user_cache_requests_total", "Authenticated user cache lookups by result"
+)
+user_cache_invalidations = Counter(
+    "user_cache_invalidations_total", "Authenticated user cache invalidations by kind"
+)
+user_cache_size = Gauge("user_cache_entries", "Entries held by the user cache")
+
+
+class UserCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.tokens = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.users = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.summaries = TTLCache(maxsize=maxsize, ttl=ttl)
+        user_cache_size.set_function(lambda: len(self.tokens), kind="token")
+        user_cache_size.set_function(lambda: len(self.users), kind="user")
+        user_cache_size.set_function(lambda: len(self.summaries), kind="summary")
+
+    def get(self, token: str) -> ODMUser | UserProfile | None:
+        user_id = self.tokens.get(token)
+        user = None if user_id is None else self.users.get(user_id)
+        user_cache_requests.inc(result="miss" if user is None else "hit")
+        return user
+
+    def put(
+        self, token: str, user: ODMUser | UserProfile, ttl: float | None = None
+    ) -> None:
+        user_id = str(user.id)
+        self.tokens.set(token, user_id, ttl=ttl)
+        self.users.set(user_id, user)
+
+    def get_summary(
+        self, user_id: str
+    ) -> ODMUser | UserProfile | UserSummary | None:
+        # 인증용 사용자 프로필도 name/profile_url/id를 가지므로 요약으로 그대로 사용
+        return self.users.get(user_id) or self.summaries.get(user_id)
+
+    def put_summary(self, summary: UserSummary) -> None:
+        self.summaries.set(str(summary.id), summary)
+
+    def forget_token(self, token: str) -> None:
+        self.tokens.pop(token)
+
+    def forget_user(self, user_id: str) -> None:
+        self.users.pop(user_id)
+        self.summaries.pop(user_id)
+
+    async def invalidate_token(self, token: str) -> None:
+        self.forget_token(token)
+        await self._publish({"token": token})
+
+    async def invalidate_user(self, user_id: str) -> None:
+        self.forget_user(user_id)
+        await self._publish({"user_id": user_id})
+
+    async def _publish(self, message: dict) -> None:
+        try:
+            await cache_bus.publish(USER_CACHE_CHANNEL, message)
+        except Exception as e:
+            logger.warning(f"Failed to publish user cache invalidation: {e}")
+
+    def on_invalidate(self, message: dict) -> None:
+        if message.get("token"):
+            self.forget_token(message["token"])
+            user_cache_invalidations.inc(kind="token")
+        if message.get("user_id"):
+            self.forget_user(message["user_id"])
+            user_cache_invalidations.inc(kind="user")
+
+
+user_cache = UserCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+cache_bus.subscribe(USER_CACHE_CHANNEL, user_cache.on_invalidate)
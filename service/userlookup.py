@@ -0,0 +1,29 @@
+from typing import Iterable
+from uuid import UUID
+
+from beanie.operators import In
+
+from entity.user import User as ODMUser, UserSummary
+from service.usercache import user_cache
+
+
+async def resolve_users(user_ids: Iterable[str]) -> dict[str, ODMUser | UserSummary]:
+    resolved = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        summary = user_cache.get_summary(user_id)
+        if summary is not None:
+            resolved[user_id] = summary
+            continue
+        try:
+            missing.append(UUID(user_id))
+        except ValueError:
+            continue
+
+    if missing:
+        async for summary in ODMUser.find(
+            In(ODMUser.id, missing), projection_model=UserSummary
+        ):
+            user_cache.put_summary(summary)
+            resolved[str(summary.id)] = summary
+    return resolved
@@ -1,6 +1,5 @@
-import json
-
-from service.credential import get_redis_pool
+from app.redisconn import get_redis_pool
+from utils import codec
 from datetime import timedelta
 
 from fastapi import HTTPException, status, Security
@@ -12,31 +11,45 @@ security = HTTPBearer(
 )
 
 
+SESSION_KEY_PREFIX = "session:"
+SESSION_TTL = timedelta(days=10)
+
+
+def session_key(token: str) -> str:
+    return SESSION_KEY_PREFIX + token
+
+
 class UserSession:
-    def __init__(self, token: str):
+    def __init__(self, token: str, ttl: timedelta = SESSION_TTL):
         self.token = token
-        self.redis_connection = get_redis_pool()
+        self.ttl = ttl
+
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    @property
+    def key(self) -> str:
+        return session_key(self.token)
 
     async def set_expire(self, expire: timedelta) -> None:
-        session_key = "SessionToken" + self.token
-        await self.redis_connection.expire(session_key, expire)
+        self.ttl = expire
+        await self.redis_connection.expire(self.key, expire)
 
     async def update(self, data: dict) -> None:
-        session_key = "SessionToken" + self.token
-        await self.redis_connection.hset("session", session_key, json.dumps(data))
+        await self.redis_connection.set(self.key, codec.encode(data), ex=self.ttl)
 
     async def get(self) -> dict:
-        session_key = "SessionToken" + self.token
-        data = await self.redis_connection.hget("session", session_key)
-        return json.loads(data)
+        # 읽을 때마다 TTL을 갱신하는 sliding expiry
+        data = await self.redis_connection.getex(self.key, ex=self.ttl)
+        return codec.decode(data)
 
     async def delete(self) -> None:
-        session_key = "SessionToken" + self.token
-        await self.redis_connection.hdel("session", session_key)
+        await self.redis_connection.delete(self.key)
 
     async def is_valid(self) -> bool:
-        session_key = "SessionToken" + self.token
-        return await self.redis_connection.hexists("session", session_key)
+        # EXPIRE는 키가 있을 때만 성공하므로 존재 확인과 TTL 갱신을 한 번에 처리
+        return bool(await self.redis_connection.expire(self.key, self.ttl))
 
 
 async def get_active_user_session(
@@ -1,5 +1,89 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Callable
+
 from fastapi import WebSocket
-from service.credential import get_redis_pool
+from app.redisconn import get_redis_pool
+from utils.log import Logger
+from utils.metrics import Counter, Gauge
+
+logger = Logger.create(__name__, level=logging.DEBUG)
+
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+# coalesce: 큐가 가득 차면 가장 오래된 메시지를 버림
+# disconnect: 큐가 가득 찬 느린 클라이언트를 끊음
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce")
+WS_CHANNEL_PREFIX = "ws:flow:"
+
+ws_connections = Gauge("ws_connections", "Open WebSocket connections on this worker")
+ws_send_queue_depth = Gauge(
+    "ws_send_queue_depth", "Messages waiting in WebSocket send queues"
+)
+ws_messages_dropped = Counter(
+    "ws_messages_dropped_total", "Messages coalesced away for slow consumers"
+)
+ws_evictions = Counter(
+    "ws_evictions_total", "WebSocket connections evicted by reason"
+)
+ws_backplane_messages = Counter(
+    "ws_backplane_messages_total", "Broadcasts exchanged over the Redis backplane"
+)
+ws_backplane_subscriptions = Gauge(
+    "ws_backplane_subscriptions", "Flow channels this worker is subscribed to"
+)
+
+
+def flow_channel(flow_id: str) -> str:
+    return WS_CHANNEL_PREFIX + flow_id
+
+
+class Connection:
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_evict: Callable[["Connection", str], None],
+        maxsize: int = WS_SEND_QUEUE_SIZE,
+        policy: str = WS_SLOW_CONSUMER_POLICY,
+    ):
+        self.websocket = websocket
+        self.policy = policy
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self._on_evict = on_evict
+        self._sender = asyncio.create_task(self._send_loop())
+
+    def offer(self, message: str) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.policy == "disconnect":
+            return False
+        self.queue.get_nowait()
+        self.queue.put_nowait(message)
+        ws_messages_dropped.inc()
+        return True
+
+    async def _send_loop(self) -> None:
+        while True:
+            message = await self.queue.get()
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(message), timeout=WS_SEND_TIMEOUT
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"WebSocket send failed, evicting connection: {e}")
+                self._on_evict(self, "send_error")
+                return
+
+    def close(self) -> None:
+        self._sender.cancel()
 
 
 class ConnectionManager:
@@ -9,33 +93,150 @@ class ConnectionManager:
         if cls._instance is None:
             cls._instance = super(ConnectionManager, cls).__new__(cls)
             cls._instance.active_connections = {}
-            cls._instance.redis_connection = get_redis_pool()
+            # 다른 워커가 보낸 메시지와 자신이 보낸 메시지를 구분하기 위한 ID
+            cls._instance.node_id = uuid.uuid4().hex
+            cls._instance.subscribed_flows = set()
+            cls._instance._pubsub = None
+            cls._instance._listener = None
+            cls._instance._subscription_lock = asyncio.Lock()
+            ws_connections.set_function(cls._instance.connection_count)
+            ws_send_queue_depth.set_function(cls._instance.queued_messages)
+            ws_backplane_subscriptions.set_function(
+                lambda: len(cls._instance.subscribed_flows)
+            )
         return cls._instance
 
+    @property
+    def redis_connection(self):
+        return get_redis_pool()
+
+    def connection_count(self) -> int:
+        return sum(len(users) for users in self.active_connections.values())
+
+    def queued_messages(self) -> int:
+        return sum(
+            connection.queue.qsize()
+            for users in self.active_connections.values()
+            for connection in users.values()
+        )
+
     async def connect(self, flow_id: str, user_id: str, websocket: WebSocket):
         if flow_id not in self.active_connections:
             self.active_connections[flow_id] = {}
-        self.active_connections[flow_id][user_id] = websocket
+        previous = self.active_connections[flow_id].get(user_id)
+        if previous is not None:
+            previous.close()
+        self.active_connections[flow_id][user_id] = Connection(
+            websocket,
+            on_evict=lambda connection, reason: self._evict(
+                flow_id, user_id, connection, reason
+            ),
+        )
+        await self._sync_subscription(flow_id)
 
     def disconnect(self, flow_id: str, user_id: str):
         if (
             flow_id in self.active_connections
             and user_id in self.active_connections[flow_id]
         ):
-            del self.active_connections[flow_id][user_id]
+            self.active_connections[flow_id].pop(user_id).close()
             if not self.active_connections[flow_id]:
                 del self.active_connections[flow_id]
+                asyncio.create_task(self._sync_subscription(flow_id))
+
+    def _evict(
+        self, flow_id: str, user_id: str, connection: Connection, reason: str
+    ) -> None:
+        # 재접속으로 이미 교체된 연결이면 새 연결을 건드리지 않음
+        if self.active_connections.get(flow_id, {}).get(user_id) is not connection:
+            return
+        ws_evictions.inc(reason=reason)
+        self.disconnect(flow_id, user_id)
+        asyncio.create_task(self._close_websocket(connection.websocket))
+
+    @staticmethod
+    async def _close_websocket(websocket: WebSocket) -> None:
+        try:
+            await websocket.close()
+        except Exception:
+            pass
 
     def get(self, flow_id: str, user_id: str) -> WebSocket:
-        return self.active_connections.get(flow_id, {}).get(user_id)
+        connection = self.active_connections.get(flow_id, {}).get(user_id)
+        return None if connection is None else connection.websocket
+
+    def _deliver_local(self, flow_id: str, message: str) -> None:
+        if flow_id not in self.active_connections:
+            return
+        for user_id, connection in list(self.active_connections[flow_id].items()):
+            if not connection.offer(message):
+                self._evict(flow_id, user_id, connection, "slow_consumer")
 
     async def broadcast(self, flow_id: str, data: dict):
-        if flow_id in self.active_connections:
-            for connection in self.active_connections[flow_id].values():
-                try:
-                    await connection.send_json(data)
-                except Exception as e:
-                    print(f"Broadcasting error: {e}")
+        # 한 번만 직렬화하고 각 연결의 송신 큐에 넣기만 하므로
+        # 느린 클라이언트가 방 전체를 막지 않음
+        message = json.dumps(data)
+        self._deliver_local(flow_id, message)
+        try:
+            await self.redis_connection.publish(
+                flow_channel(flow_id), f"{self.node_id}|{message}"
+            )
+            ws_backplane_messages.inc(direction="out")
+        except Exception as e:
+            logger.warning(f"Backplane publish failed for {flow_id}: {e}")
+
+    async def start(self) -> None:
+        if self._pubsub is None:
+            self._pubsub = self.redis_connection.pubsub(ignore_subscribe_messages=True)
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._pubsub is None:
+            return
+        self._listener.cancel()
+        await asyncio.gather(self._listener, return_exceptions=True)
+        await self._pubsub.aclose()
+        self._pubsub = None
+        self._listener = None
+        self.subscribed_flows.clear()
+
+    async def _sync_subscription(self, flow_id: str) -> None:
+        # 이 워커에 접속자가 있는 flow 채널만 구독
+        if self._pubsub is None:
+            return
+        async with self._subscription_lock:
+            wanted = flow_id in self.active_connections
+            try:
+                if wanted and flow_id not in self.subscribed_flows:
+                    await self._pubsub.subscribe(flow_channel(flow_id))
+                    self.subscribed_flows.add(flow_id)
+                elif not wanted and flow_id in self.subscribed_flows:
+                    await self._pubsub.unsubscribe(flow_channel(flow_id))
+                    self.subscribed_flows.discard(flow_id)
+            except Exception as e:
+                logger.warning(f"Backplane subscription failed for {flow_id}: {e}")
+
+    async def _listen(self) -> None:
+        while True:
+            if not self.subscribed_flows:
+                await asyncio.sleep(0.5)
+                continue
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Backplane receive error: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            channel = message["channel"].decode()
+            origin, _, payload = message["data"].decode().partition("|")
+            if origin == self.node_id:
+                continue
+            ws_backplane_messages.inc(direction="in")
+            self._deliver_local(channel[len(WS_CHANNEL_PREFIX) :], payload)
 
 
 connection_manager = ConnectionManager()
@@ -0,0 +1,94 @@
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 저장 형식: MAGIC + 코덱 ID 1바이트 + 플래그 1바이트 + 본문
+# JSON 텍스트는 \x00으로 시작할 수 없으므로 헤더가 없으면 예전 JSON 값으로 읽음
+MAGIC = b"\x00SP"
+CODEC_JSON = 1
+CODEC_MSGPACK = 2
+FLAG_ZSTD = 1
+
+CODEC_NAMES = {"json": CODEC_JSON, "msgpack": CODEC_MSGPACK}
+STORAGE_CODEC = os.getenv("STORAGE_CODEC", "json")
+STORAGE_COMPRESS_THRESHOLD = int(os.getenv("STORAGE_COMPRESS_THRESHOLD", "4096"))
+ZSTD_LEVEL = 3
+
+
+def _dumps_json(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _loads_json(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _serialize(value: Any, codec: int) -> bytes:
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("msgpack codec requested but msgpack is not installed")
+        return msgpack.packb(value, use_bin_type=True)
+    return _dumps_json(value)
+
+
+def _deserialize(body: bytes, codec: int) -> Any:
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("msgpack value found but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    if codec == CODEC_JSON:
+        return _loads_json(body)
+    raise ValueError(f"Unknown storage codec {codec}")
+
+
+def encode(
+    value: Any,
+    codec: str = STORAGE_CODEC,
+    compress_threshold: int | None = STORAGE_COMPRESS_THRESHOLD,
+) -> bytes:
+    codec_id = CODEC_NAMES[codec]
+    body = _serialize(value, codec_id)
+    flags = 0
+    if (
+        zstandard is not None
+        and compress_threshold is not None
+        and len(body) >= compress_threshold
+    ):
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+        flags |= FLAG_ZSTD
+    return MAGIC + bytes((codec_id, flags)) + body
+
+
+def decode(raw: bytes | str | None) -> Any:
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        raw = raw.encode()
+    if not raw.startswith(MAGIC):
+        return _loads_json(raw)
+    codec_id, flags = raw[len(MAGIC)], raw[len(MAGIC) + 1]
+    body = raw[len(MAGIC) + 2 :]
+    if flags & FLAG_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd value found but zstandard is not installed")
+        body = zstandard.ZstdDecompressor().decompress(body)
+    return _deserialize(body, codec_id)
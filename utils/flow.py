@@ -23,3 +23,111 @@ def update_dict_in_list(
                 data_list[index][key] = new_data
             break
     return data_list
+
+
+def keeps_id(item_id: str, new_data, key: str = None) -> bool:
+    # 인덱스 키와 요소의 id가 어긋나지 않도록 update로 id를 바꾸는 것은 허용하지 않음
+    if key is None:
+        return isinstance(new_data, dict) and new_data.get("id", item_id) == item_id
+    return key != "id" or new_data == item_id
+
+
+class FlowGraph:
+    def __init__(
+        self, nodes: list[dict] | None = None, edges: list[dict] | None = None
+    ):
+        self.nodes: dict[str, dict] = {}
+        self.edges: dict[str, dict] = {}
+        self._outgoing: dict[str, set[str]] = {}
+        self._incoming: dict[str, set[str]] = {}
+        for node in nodes or []:
+            self.nodes[node["id"]] = node
+        for edge in edges or []:
+            self.upsert_edge(edge)
+
+    @classmethod
+    def from_dict(cls, flow_data: dict) -> "FlowGraph":
+        return cls(flow_data.get("nodes"), flow_data.get("edges"))
+
+    def to_dict(self) -> dict:
+        return {"nodes": list(self.nodes.values()), "edges": list(self.edges.values())}
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self.nodes
+
+    def has_edge(self, edge_id: str) -> bool:
+        return edge_id in self.edges
+
+    def get_node(self, node_id: str) -> dict | None:
+        return self.nodes.get(node_id)
+
+    def get_edge(self, edge_id: str) -> dict | None:
+        return self.edges.get(edge_id)
+
+    def upsert_node(self, node: dict) -> None:
+        # 기존 노드는 자리를 유지한 채 교체되어 직렬화 순서가 바뀌지 않음
+        self.nodes[node["id"]] = node
+
+    def update_node(self, node_id: str, new_data, key: str = None) -> bool:
+        if node_id not in self.nodes:
+            return False
+        if not keeps_id(node_id, new_data, key):
+            raise ValueError(f"Cannot change the id of node {node_id}")
+        if key is None:
+            self.nodes[node_id] = {**new_data, "id": node_id}
+        else:
+            self.nodes[node_id][key] = new_data
+        return True
+
+    def remove_node(self, node_id: str) -> dict | None:
+        node = self.nodes.pop(node_id, None)
+        if node is not None:
+            connected = self._outgoing.get(node_id, set())
+            connected = connected | self._incoming.get(node_id, set())
+            for edge_id in connected:
+                self.remove_edge(edge_id)
+        return node
+
+    def upsert_edge(self, edge: dict) -> None:
+        previous = self.edges.get(edge["id"])
+        if previous is not None:
+            self._unindex_edge(previous)
+        self.edges[edge["id"]] = edge
+        self._outgoing.setdefault(edge["source"], set()).add(edge["id"])
+        self._incoming.setdefault(edge["target"], set()).add(edge["id"])
+
+    def update_edge(self, edge_id: str, new_data, key: str = None) -> bool:
+        if edge_id not in self.edges:
+            return False
+        if not keeps_id(edge_id, new_data, key):
+            raise ValueError(f"Cannot change the id of edge {edge_id}")
+        if key is None:
+            self.upsert_edge({**new_data, "id": edge_id})
+        else:
+            edge = dict(self.edges[edge_id])
+            edge[key] = new_data
+            self.upsert_edge(edge)
+        return True
+
+    def remove_edge(self, edge_id: str) -> dict | None:
+        edge = self.edges.pop(edge_id, None)
+        if edge is not None:
+            self._unindex_edge(edge)
+        return edge
+
+    def _unindex_edge(self, edge: dict) -> None:
+        for index, node_id in (
+            (self._outgoing, edge["source"]),
+            (self._incoming, edge["target"]),
+        ):
+            edge_ids = index.get(node_id)
+            if edge_ids is not None:
+                edge_ids.discard(edge["id"])
+                if not edge_ids:
+                    del index[node_id]
+
+    def outgoing(self, node_id: str) -> list[dict]:
+        return [self.edges[edge_id] for edge_id in self._outgoing.get(node_id, ())]
+
+    def incoming(self, node_id: str) -> list[dict]:
+        return [self.edges[edge_id] for edge_id in self._incoming.get(node_id, ())]
@@ -0,0 +1,122 @@
+import json
+import re
+from typing import Any
+
+# 모델이 JSON 앞뒤에 붙이는 코드 펜스만 허용 (본문 안의 ``` 나 json 은 건드리지 않음)
+PREFIX_PATTERN = re.compile(r"\s*(?:```(?:json)?)?\s*", re.IGNORECASE)
+SUFFIX_PATTERN = re.compile(r"\s*(?:```)?\s*")
+WHITESPACE = " \t\r\n"
+
+
+# 스트리밍되는 최상위 JSON 객체를 읽으면서 값이 닫힌 필드를 바로 돌려줌
+class JsonFieldStream:
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._start: int | None = None
+        self._end: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        # key -> colon -> value -> (string | container | primitive) -> comma
+        self._expect = "object"
+        self._key: str | None = None
+        self._value_start = 0
+        self.fields: dict[str, Any] = {}
+
+    def _error(self, message: str, pos: int) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buffer, pos)
+
+    def _emit(self, end: int, events: list[tuple[str, Any]]) -> None:
+        raw = self.buffer[self._value_start : end]
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise self._error(f"Invalid value for {self._key!r}: {e.msg}", end)
+        self.fields[self._key] = value
+        events.append((self._key, value))
+        self._expect = "comma"
+
+    def feed(self, text: str) -> list[tuple[str, Any]]:
+        self.buffer += text
+        events: list[tuple[str, Any]] = []
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._end is not None:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == "key_string":
+                        self._key = json.loads(buffer[self._string_start : i + 1])
+                        self._expect = "colon"
+                    elif self._depth == 1 and self._expect == "string":
+                        self._emit(i + 1, events)
+                continue
+
+            if self._expect == "object":
+                if char == "{":
+                    if not PREFIX_PATTERN.fullmatch(buffer[:i]):
+                        raise self._error("Unexpected text before JSON object", 0)
+                    self._start = i
+                    self._depth = 1
+                    self._expect = "key"
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+                if self._depth == 1 and self._expect == "key":
+                    self._expect = "key_string"
+                elif self._depth == 1 and self._expect == "value":
+                    self._value_start = i
+                    self._expect = "string"
+            elif char in "{[":
+                if self._depth == 1:
+                    if self._expect != "value":
+                        raise self._error("Unexpected container", i)
+                    self._value_start = i
+                    self._expect = "container"
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._emit(i + 1, events)
+                elif self._depth == 0:
+                    if self._expect == "primitive":
+                        self._emit(i, events)
+                    self._end = i + 1
+            elif self._depth != 1 or char in WHITESPACE:
+                continue
+            elif char == ":" and self._expect == "colon":
+                self._expect = "value"
+            elif char == ",":
+                if self._expect == "primitive":
+                    self._emit(i, events)
+                self._expect = "key"
+            elif self._expect == "value":
+                self._value_start = i
+                self._expect = "primitive"
+        self._pos = len(buffer)
+        return events
+
+    def close(self) -> dict:
+        if self._end is None:
+            if self._start is None and not self.buffer.strip():
+                raise self._error("Expecting value", 0)
+            raise self._error("Unterminated JSON object", len(self.buffer))
+        if not SUFFIX_PATTERN.fullmatch(self.buffer[self._end :]):
+            raise self._error("Extra data after JSON object", self._end)
+        return json.loads(self.buffer[self._start : self._end])
+
+
+def parse_json_object(text: str) -> dict:
+    stream = JsonFieldStream()
+    stream.feed(text)
+    return stream.close()
@@ -1,75 +1,212 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
-
-logging.basicConfig(
-    format="[%(name)s] (%(asctime)s) %(levelname)s:%(message)s",
-    datefmt="%m/%d %I:%M:%S %p",
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+# json: 한 줄에 하나의 JSON 객체 (운영), text: 사람이 읽는 형식 (로컬 개발)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+TEXT_FORMAT = "[%(name)s] (%(asctime)s) %(levelname)s [%(request_id)s]:%(message)s"
+TEXT_DATE_FORMAT = "%m/%d %I:%M:%S %p"
+
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "request_id", default=None
 )
 
 
+class RequestIdFilter(logging.Filter):
+    # 큐에 넣기 전, 로그를 남긴 요청의 컨텍스트에서 request id를 기록
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    # max_level 이하의 로그는 rate 비율만 남김 (자주 찍히는 디버그 경로용)
+    def __init__(self, rate: float, max_level: int = logging.DEBUG):
+        super().__init__()
+        self.rate = rate
+        self.max_level = max_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > self.max_level or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", "-")
+        if request_id != "-":
+            entry["request_id"] = request_id
+        # 큐를 거친 레코드는 exc_info 대신 미리 만든 exc_text만 가지고 있음
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def create_formatter(log_format: str = LOG_FORMAT) -> logging.Formatter:
+    if log_format == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT, datefmt=TEXT_DATE_FORMAT)
+
+
+_exception_formatter = logging.Formatter()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # 기본 prepare는 traceback을 메시지에 합쳐 버리므로 메시지와 예외를 따로 남김
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            # traceback이 프레임을 붙잡고 있지 않도록 텍스트만 넘김
+            record.exc_info = None
+        return record
+
+
+class _LoggerNameFilter(logging.Filter):
+    def __init__(self):
+        super().__init__()
+        self.names: set[str] = set()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.name in self.names
+
+
+class _FanoutHandler(logging.Handler):
+    # 리스너 스레드에서 실행되며 등록된 출력 핸들러에 차례로 전달
+    def __init__(self):
+        super().__init__()
+        self.sinks: list[logging.Handler] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        for sink in self.sinks:
+            if record.levelno >= sink.level:
+                sink.handle(record)
+
+
+class LogPipeline:
+    # 로거는 큐에 넣기만 하고 실제 출력(stderr, 파일)은 별도 스레드에서 처리
+    def __init__(
+        self, log_format: str = LOG_FORMAT, stream=None, log_dir: str = LOG_DIR
+    ):
+        self.log_dir = log_dir
+        self.formatter = create_formatter(log_format)
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.handler = _QueueHandler(self.queue)
+        self.handler.addFilter(RequestIdFilter())
+        self._fanout = _FanoutHandler()
+        stream_handler = logging.StreamHandler(stream or sys.stderr)
+        stream_handler.setFormatter(self.formatter)
+        self._fanout.sinks.append(stream_handler)
+        self._files: dict[str, _LoggerNameFilter] = {}
+        self._lock = threading.Lock()
+        self._listener: logging.handlers.QueueListener | None = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = logging.handlers.QueueListener(self.queue, self._fanout)
+            self._listener.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._listener is None:
+                return
+            # 큐에 남은 로그를 모두 내보낸 뒤 종료
+            self._listener.stop()
+            self._listener = None
+        for sink in self._fanout.sinks:
+            sink.flush()
+
+    def attach(self, logger: logging.Logger) -> None:
+        # 같은 로거를 여러 번 설정해도 핸들러는 하나만 붙도록 함
+        if self.handler not in logger.handlers:
+            logger.addHandler(self.handler)
+        logger.propagate = False
+        self.start()
+
+    def route_file(self, file_name: str, logger_name: str) -> None:
+        with self._lock:
+            route = self._files.get(file_name)
+            if route is None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                file_handler = logging.FileHandler(
+                    os.path.join(self.log_dir, f"{file_name}.log"), encoding="utf-8"
+                )
+                file_handler.setFormatter(self.formatter)
+                route = _LoggerNameFilter()
+                file_handler.addFilter(route)
+                self._files[file_name] = route
+                self._fanout.sinks.append(file_handler)
+            route.names.add(logger_name)
+
+
+log_pipeline = LogPipeline()
+
+
 class Logger:
     @staticmethod
     def create(
-        name: str, /, level: int, file_name: str | None = None
+        name: str,
+        /,
+        level: int,
+        file_name: str | None = None,
+        sample_rate: float | None = None,
     ) -> logging.Logger:
         new_logger = logging.getLogger(name)
 
         new_logger.setLevel(level)
-
-        stream_handler = logging.StreamHandler()
-        new_logger.addHandler(stream_handler)
+        log_pipeline.attach(new_logger)
 
         if not file_name is None:
-            file_handler = logging.FileHandler(f"logs/{file_name}.log")
-            new_logger.addHandler(file_handler)
+            log_pipeline.route_file(file_name, name)
+
+        for sampling in [
+            f for f in new_logger.filters if isinstance(f, SamplingFilter)
+        ]:
+            new_logger.removeFilter(sampling)
+        if sample_rate is not None:
+            new_logger.addFilter(SamplingFilter(sample_rate))
 
         return new_logger
 
     @staticmethod
     def dev(name: str, /) -> logging.Logger:
-        new_logger = logging.getLogger(name)
-        new_logger.setLevel(logging.DEBUG)
-
-        stream_handler = logging.StreamHandler()
-        new_logger.addHandler(stream_handler)
-        return new_logger
+        return Logger.create(name, level=logging.DEBUG)
 
     @staticmethod
     def prd(name: str, /, file_name: str | None = None) -> logging.Logger:
-        new_logger = logging.getLogger(name)
-        new_logger.setLevel(logging.INFO)
-
-        stream_handler = logging.StreamHandler()
-        new_logger.addHandler(stream_handler)
-
-        file_handler = logging.FileHandler(f"logs/{file_name or name}.log")
-        new_logger.addHandler(file_handler)
-
-        return new_logger
+        return Logger.create(name, level=logging.INFO, file_name=file_name or name)
 
     @staticmethod
     def warn(name: str, /, file_name: str | None = None) -> logging.Logger:
-        new_logger = logging.getLogger(name)
-        new_logger.setLevel(logging.WARN)
-
-        stream_handler = logging.StreamHandler()
-        new_logger.addHandler(stream_handler)
-
-        if not file_name is None:
-            file_handler = logging.FileHandler(f"logs/{file_name}.log")
-            new_logger.addHandler(file_handler)
-
-        return new_logger
+        return Logger.create(name, level=logging.WARN, file_name=file_name)
 
     @staticmethod
     def error(name: str, /, file_name: str | None = None) -> logging.Logger:
-        new_logger = logging.getLogger(name)
-        new_logger.setLevel(logging.ERROR)
-
-        stream_handler = logging.StreamHandler()
-        new_logger.addHandler(stream_handler)
-
-        if not file_name is None:
-            file_handler = logging.FileHandler(f"logs/{file_name}.log")
-            new_logger.addHandler(file_handler)
-
-        return new_logger
+        return Logger.create(name, level=logging.ERROR, file_name=file_name)
@@ -0,0 +1,38 @@
+import asyncio
+
+from utils.metrics import Gauge
+
+event_loop_lag = Gauge(
+    "event_loop_lag_seconds", "How late the event loop woke up a periodic timer"
+)
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.lag = 0.0
+        self._task: asyncio.Task | None = None
+        event_loop_lag.set_function(lambda: self.lag)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.lag = 0.0
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            # 타이머가 늦게 깨어난 만큼이 다른 작업이 루프를 붙잡고 있던 시간
+            self.lag = max(0.0, loop.time() - started - self.interval)
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -1,32 +1,120 @@
+import asyncio
+import os
+import random
+import time
 from typing import Any
-from aiohttp import ClientSession
+from aiohttp import (
+    ClientError,
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+)
+
+from utils.metrics import Counter, Histogram
+
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_KEEPALIVE_TIMEOUT = 30
+HTTP_DNS_CACHE_TTL = 300
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+outbound_request_seconds = Histogram(
+    "outbound_request_seconds", "Outbound HTTP latency until response headers"
+)
+outbound_request_retries = Counter(
+    "outbound_request_retries_total", "Outbound HTTP requests retried"
+)
+
+_shared_session: ClientSession | None = None
+
+
+def get_shared_session() -> ClientSession:
+    global _shared_session
+    if _shared_session is None or _shared_session.closed:
+        _shared_session = ClientSession(
+            connector=TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ),
+            timeout=ClientTimeout(
+                connect=HTTP_CONNECT_TIMEOUT,
+                sock_read=HTTP_READ_TIMEOUT,
+            ),
+        )
+    return _shared_session
+
+
+async def close_shared_session() -> None:
+    global _shared_session
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
 
 
 class BaseRequest:
-    def __init__(self, session: ClientSession | None = None) -> None:
-        self.session: ClientSession | None = session
+    def __init__(
+        self,
+        session: ClientSession | None = None,
+        vendor: str = "default",
+        max_retries: int = 2,
+        backoff: float = 0.2,
+    ) -> None:
+        self._session: ClientSession | None = session
+        self.vendor = vendor
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    @property
+    def session(self) -> ClientSession:
+        if self._session is not None and not self._session.closed:
+            return self._session
+        return get_shared_session()
 
     async def request(
         self,
         url: str,
         method: str,
+        retry: bool | None = None,
         **kwargs: Any,
-    ):
-        if not self.session or self.session.closed:
-            self.session = ClientSession()
-
-        resp = await self.session.request(method, url, **kwargs)
+    ) -> ClientResponse:
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        attempts = self.max_retries + 1 if retry else 1
 
-        return resp
-
-    async def post(self, url: str, **kwargs: Any):
-        if not self.session or self.session.closed:
-            self.session = ClientSession()
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 >= attempts
+            started = time.perf_counter()
+            try:
+                resp = await self.session.request(method, url, **kwargs)
+            except (ClientError, asyncio.TimeoutError):
+                outbound_request_seconds.observe(
+                    time.perf_counter() - started, vendor=self.vendor, method=method
+                )
+                if last_attempt:
+                    raise
+            else:
+                outbound_request_seconds.observe(
+                    time.perf_counter() - started, vendor=self.vendor, method=method
+                )
+                if last_attempt or resp.status not in RETRY_STATUSES:
+                    return resp
+                resp.release()
+            outbound_request_retries.inc(vendor=self.vendor)
+            # full jitter 지수 백오프
+            await asyncio.sleep(random.uniform(0, self.backoff * 2**attempt))
 
+    async def post(self, url: str, **kwargs: Any) -> ClientResponse:
         return await self.request(url, "POST", **kwargs)
 
-    async def get(self, url: str, **kwargs: Any):
-        if not self.session or self.session.closed:
-            self.session = ClientSession()
-
+    async def get(self, url: str, **kwargs: Any) -> ClientResponse:
         return await self.request(url, "GET", **kwargs)
+
+    async def patch(self, url: str, **kwargs: Any) -> ClientResponse:
+        return await self.request(url, "PATCH", **kwargs)
@@ -0,0 +1,41 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator
+
+SSE_HEARTBEAT = ": heartbeat\n\n"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    lines = "".join(f"data: {line}\n" for line in payload.split("\n"))
+    return f"event: {event}\n{lines}\n"
+
+
+async def with_heartbeat(
+    events: AsyncIterator[str], interval: float
+) -> AsyncIterator[str]:
+    # 다음 이벤트를 기다리는 동안 interval마다 주석 라인을 보내 연결을 유지
+    iterator = events.__aiter__()
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield SSE_HEARTBEAT
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = None
+            yield item
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        # 안쪽 제너레이터의 finally가 바로 실행되도록 닫아줌
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()